@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Benchmark and regression check for cursor_builder.py
+#
+#   python3 cursor_bench.py              build every variant into a temporary folder, time each
+#                                        stage and compare every cursor name with cursors.golden
+#   python3 cursor_bench.py -r 5         keep the best of 5 runs of each stage
+#   python3 cursor_bench.py -j 4         worker processes for the full build (default: one per core)
+#   python3 cursor_bench.py --update     rewrite cursors.golden from this build
+#
+# cursors.golden holds one line per theme and cursor name: the number of images and a sha1 over
+# each image's nominal size, dimensions, hotspot, delay and pixels, read back from the built
+# Xcursor file. Two builders agree when their cursors look and animate the same.
+# Exit status is 1 when a name differs from the golden file, is missing or is new.
+import os
+import io
+import sys
+import time
+import struct
+import shutil
+import hashlib
+import tempfile
+import contextlib
+
+import cursor_builder
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN = os.path.join(HERE, 'cursors.golden')
+
+def read_xcursor(path):
+	# Images of an Xcursor file as (nominal size, width, height, xhot, yhot, delay, pixels)
+	f = open(path, 'rb')
+	data = f.read()
+	f.close()
+	magic, header_size, version, ntoc = cursor_builder.XCURSOR_FILE_HEADER.unpack_from(data, 0)
+	if magic != cursor_builder.XCURSOR_MAGIC:
+		raise ValueError("{} is not an Xcursor file".format(path))
+	frames = []
+	for i in range(ntoc):
+		chunk_type, subtype, position = cursor_builder.XCURSOR_TOC.unpack_from(data, header_size + i * cursor_builder.XCURSOR_TOC.size)
+		if chunk_type != cursor_builder.XCURSOR_IMAGE_TYPE:
+			continue
+		chunk_size, chunk_type, size, version, width, height, xhot, yhot, delay = cursor_builder.XCURSOR_CHUNK_HEADER.unpack_from(data, position)
+		pixels = data[position + chunk_size:position + chunk_size + width * height * 4]
+		if len(pixels) != width * height * 4:
+			raise ValueError("{}: image {} is truncated".format(path, i))
+		frames.append((size, width, height, xhot, yhot, delay, pixels))
+	return frames
+
+def frames_digest(frames):
+	digest = hashlib.sha1()
+	for size, width, height, xhot, yhot, delay, pixels in frames:
+		digest.update(struct.pack('<6L', size, width, height, xhot, yhot, delay))
+		digest.update(pixels)
+	return digest.hexdigest()
+
+def read_golden(file_name):
+	golden = {}
+	if os.path.exists(file_name):
+		f = open(file_name)
+		for line in f:
+			if line.strip() and not line.startswith('#'):
+				theme, name, count, digest = line.split()
+				golden[(theme, name)] = (int(count), digest)
+		f.close()
+	return golden
+
+def write_golden(file_name, results):
+	f = open(file_name, 'w')
+	f.write("# Generated by cursor_bench.py --update: <theme> <cursor name> <images> <sha1 of images>\n")
+	for (theme, name), (count, digest) in sorted(results.items()):
+		f.write("{} {} {} {}\n".format(theme, name, count, digest))
+	f.close()
+
+def temp_tree(tmp, tree):
+	# A throwaway theme: build/ links to the real sources, cursors/ and the cache stay in tmp
+	variant = os.path.join(tmp, os.path.basename(tree))
+	os.makedirs(os.path.join(variant, 'build'))
+	for folder in ['95', 'xcursors']:
+		if os.path.isdir(os.path.join(tree, 'build', folder)):
+			os.symlink(os.path.join(tree, 'build', folder), os.path.join(variant, 'build', folder))
+	return variant
+
+def best_of(runs, stage):
+	# Run stage() `runs` times, return its last result and the fastest time
+	best = None
+	for run in range(runs):
+		start = time.perf_counter()
+		with contextlib.redirect_stdout(io.StringIO()):
+			result = stage()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return result, best
+
+def main(args):
+	runs = 1
+	jobs = os.cpu_count() or 1
+	if '-r' in args:
+		runs = max(1, int(args[args.index('-r') + 1]))
+	if '-j' in args:
+		jobs = max(1, int(args[args.index('-j') + 1]))
+	options = {'skip_first': False, 'sizes': cursor_builder.CURSOR_SIZES}
+
+	cursors = cursor_builder.load_cursor_table(cursor_builder.CURSOR_TABLE)
+	index = cursor_builder.alias_index(cursors)
+	tmp = tempfile.mkdtemp(prefix='cursor_bench.')
+	try:
+		trees = [temp_tree(tmp, os.path.join(HERE, variant)) for variant in cursor_builder.VARIANTS]
+		plans = {}
+		sources = {}
+		with contextlib.redirect_stdout(io.StringIO()):
+			for tree in trees:
+				plans[tree], missing = cursor_builder.plan_variant(tree, cursors, index)
+				for cursor, outputs, key, path in plans[tree]:
+					sources.setdefault(key, path)
+
+		# The pipeline one stage at a time, serially, so each cost shows on its own
+		timings = []
+		configs, elapsed = best_of(runs, lambda: {key: cursor_builder.parse_source(path, key[1]) for key, path in sources.items()})
+		timings.append(('parse', elapsed, "{} sources".format(len(sources))))
+		frames, elapsed = best_of(runs, lambda: {key: cursor_builder.decode_frames(os.path.basename(sources[key]), key[1], configs[key], options['skip_first'])
+			for key in sources})
+		timings.append(('decode', elapsed, "{} frames".format(sum(len(f) for f in frames.values()))))
+		built, elapsed = best_of(runs, lambda: {key: cursor_builder.encode_xcursor(cursor_builder.sized_frames(frames[key], options['sizes']))
+			for key in sources})
+		timings.append(('encode', elapsed, "sizes {}".format(','.join(str(size) for size in options['sizes']))))
+		def link():
+			for tree in trees:
+				cursor_builder.prune_variant(tree, index)
+				stale = set(cursor for cursor, outputs, key, path in plans[tree])
+				cursor_builder.write_variant(tree, plans[tree], built, stale, options)
+		result, elapsed = best_of(runs, link)
+		timings.append(('link', elapsed, "{} names in {} themes".format(len(index) * len(trees), len(trees))))
+
+		# And the real thing, process pool included
+		result, elapsed = best_of(runs, lambda: cursor_builder.main(['-f', '-j', str(jobs)] + trees))
+		timings.append(('full build', elapsed, "{} jobs".format(jobs)))
+
+		def verify():
+			results = {}
+			for tree in trees:
+				cursors_dir = os.path.join(tree, 'cursors')
+				for name in sorted(os.listdir(cursors_dir)):
+					frames = read_xcursor(os.path.join(cursors_dir, name))
+					results[(os.path.basename(tree), name)] = (len(frames), frames_digest(frames))
+			return results
+		results, elapsed = best_of(runs, verify)
+		timings.append(('read back', elapsed, "{} files".format(len(results))))
+	finally:
+		shutil.rmtree(tmp)
+
+	for stage, elapsed, note in timings:
+		print("{:<12} {:>9.1f} ms  {}".format(stage, elapsed * 1000, note))
+
+	if '--update' in args:
+		write_golden(GOLDEN, results)
+		print("Wrote {} digests to {}".format(len(results), GOLDEN))
+		return 0
+	golden = read_golden(GOLDEN)
+	differ = sorted(name for name in results if name in golden and results[name] != golden[name])
+	missing = sorted(name for name in golden if name not in results)
+	new = sorted(name for name in results if name not in golden)
+	for theme, name in differ:
+		print("  DIFFERS  {}/{}".format(theme, name))
+	for theme, name in missing:
+		print("  MISSING  {}/{}".format(theme, name))
+	for theme, name in new:
+		print("  NEW      {}/{}".format(theme, name))
+	print("golden: {} match, {} differ, {} missing, {} new".format(len(results) - len(differ) - len(new), len(differ), len(missing), len(new)))
+	return 1 if differ or missing or new else 0
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,732 @@
+#!/usr/bin/env python3
+import struct
+# Xcursors Original mapping based on https://revadig.blogspot.com/2017/09/x11-xorg-set-mouse-pointer-cursor.html
+# Hashes/Extras: https://fedoraproject.org/wiki/Artwork/EchoCursors/NamingSpec
+# QT Cursor names: https://doc.qt.io/archives/qtjambi-4.5.2_01/com/trolltech/qt/gui/QCursor.html
+# GDK Cursor: https://developer.gnome.org/gdk3/stable/gdk3-Cursors.html
+# Freedesktop cursors (fd): https://www.freedesktop.org/wiki/Specifications/cursor-spec/
+import os
+import io
+import sys
+import mmap
+import time
+import array
+import re
+import json
+import configparser
+import hashlib
+import contextlib
+import multiprocessing
+
+# If you're parsing Microsoft Windows 95 default animated cursors, pass the '-s' argument to skip the ugly first frame
+#
+# One builder for every cursor theme variant (the white and black trees share cursors.ini):
+#   python3 cursor_builder.py                         build all VARIANTS
+#   python3 cursor_builder.py Chicago95_Standard_Cursors_Black
+#   python3 cursor_builder.py -j 4                    use 4 worker processes (default: one per core)
+#   python3 cursor_builder.py -f                      ignore build/cache.json and rebuild everything
+#   python3 cursor_builder.py --sizes 32              nominal sizes per cursor file (default: CURSOR_SIZES)
+#   python3 cursor_builder.py --check ~/.icons/Chicago95_Standard_Cursors
+#                                                     check an installed theme against cursors.ini
+# Each theme's build/cursors_gen.py runs this for its own tree.
+# Sources are decoded and encoded once per distinct content across all variants, in a process pool,
+# then every variant writes its cursors/ and aliases.txt.
+# build/cache.json remembers what each cursor was built from: unchanged cursors are skipped.
+# Files in cursors/ that cursors.ini doesn't name are removed.
+
+# The cursor -> names table lives in cursors.ini next to this file
+CURSOR_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cursors.ini')
+
+		
+
+def extract_cur(file_name):
+	print("\tParsing cursor file {}".format(file_name)) 
+	# input: .cur file location/name
+	# output: dict with cursor information
+
+	f = open(file_name,'rb')
+	cur_file = f.read()
+	f.close()
+	cur_bytes = bytearray(cur_file)
+	rtIconDir = False
+	rtIconDirEntry = False
+	INFO = False
+	icon = []
+	
+	icon.append({
+		'rtIconDir' : {
+		'res' : struct.unpack('<H',cur_bytes[0:2])[0],
+		'ico_type' : struct.unpack('<H',cur_bytes[2:4])[0],
+		'ico_num_images' : struct.unpack('<H',cur_bytes[4:6])[0]
+		},
+		'ico_file' : cur_bytes,
+		#ICONDIRENTRY
+		# TODO Add multiple cursors here if needed like icons
+		'rtIconDirEntry' : {
+			'bWidth'       : cur_bytes[6], # Width, in pixels, of the image
+			'bHeight'      : cur_bytes[7], # Height, in pixels, of the image
+			'bColorCount'  : cur_bytes[8], # Number of colors in image (0 if >=8bpp)
+			'bReserved'    : cur_bytes[9], # Reserved
+			'wPlanes'      : struct.unpack('<H',cur_bytes[10:12])[0], # Color Planes
+			'wBitCount'    : struct.unpack('<H',cur_bytes[12:14])[0], # Bits per pixel
+			'dwBytesInRes' : struct.unpack('<L',cur_bytes[14:18])[0], # how many bytes in this resource?
+			'dwDIBOffset'  : struct.unpack('<H',cur_bytes[18:20])[0] # RT_ICON rnID
+		}
+		
+	})
+
+	cursor = {
+		'icon' : icon 
+	}
+
+	return cursor
+
+def decode_dib(ico_file, offset):
+	# Decode one ICO/CUR image: BITMAPINFOHEADER, palette, XOR bitmap, AND mask
+	# Returns width, height and the pixels as RGBA bytes, top row first
+	header_size, width, height, planes, bpp, compression, image_size, xppm, yppm, colors_used, colors_important = struct.unpack_from('<LllHHLLllLL', ico_file, offset)
+	if ico_file[offset:offset+4] == b'\x89PNG':
+		raise ValueError("PNG compressed icon images are not supported")
+	if compression != 0 or bpp not in (1, 4, 8, 24, 32):
+		raise ValueError("Unsupported DIB: {} bpp, compression {}".format(bpp, compression))
+	bottom_up = height > 0
+	height = abs(height) // 2 # height covers the XOR bitmap and the AND mask
+	palette = []
+	position = offset + header_size
+	if bpp <= 8:
+		for i in range(colors_used or (1 << bpp)):
+			blue, green, red, unused = struct.unpack_from('<BBBB', ico_file, position + 4 * i)
+			palette.append(bytes((red, green, blue)))
+		position += 4 * (colors_used or (1 << bpp))
+	xor_stride = ((width * bpp + 31) // 32) * 4
+	and_stride = ((width + 31) // 32) * 4
+	xor_start = position
+	and_start = position + xor_stride * height
+
+	rgba = bytearray(width * height * 4)
+	for y in range(height):
+		row = height - 1 - y if bottom_up else y
+		xor_row = xor_start + row * xor_stride
+		and_row = and_start + row * and_stride
+		for x in range(width):
+			if bpp == 32:
+				blue, green, red, alpha = ico_file[xor_row + 4 * x:xor_row + 4 * x + 4]
+				pixel = bytes((red, green, blue, alpha))
+			else:
+				if bpp == 24:
+					blue, green, red = ico_file[xor_row + 3 * x:xor_row + 3 * x + 3]
+					color = bytes((red, green, blue))
+				else:
+					bit = x * bpp
+					index = (ico_file[xor_row + bit // 8] >> (8 - bpp - bit % 8)) & ((1 << bpp) - 1)
+					color = palette[index]
+				# AND mask bit set: transparent (screen inversion has no RGBA equivalent)
+				transparent = (ico_file[and_row + x // 8] >> (7 - x % 8)) & 1
+				pixel = b'\x00\x00\x00\x00' if transparent else color + b'\xff'
+			rgba[(y * width + x) * 4:(y * width + x) * 4 + 4] = pixel
+	return width, height, bytes(rgba)
+
+def decode_cur(ico_file):
+	# All images of an ICO/CUR file as (width, height, rgba)
+	images = []
+	ico_num_images = struct.unpack_from('<H', ico_file, 4)[0]
+	for entry in range(ico_num_images):
+		dwImageOffset = struct.unpack_from('<L', ico_file, 6 + 16 * entry + 12)[0]
+		images.append(decode_dib(ico_file, dwImageOffset))
+	return images
+
+def cursor_image(ico_file):
+	# ImageMagick used to write one png per image and we kept the second one
+	images = decode_cur(ico_file)
+	return images[1] if len(images) > 1 else images[0]
+
+XCURSOR_MAGIC = b'Xcur'
+XCURSOR_VERSION = 0x10000
+XCURSOR_IMAGE_TYPE = 0xfffd0002
+XCURSOR_IMAGE_VERSION = 1
+XCURSOR_FILE_HEADER = struct.Struct('<4sLLL') # magic, header size, version, ntoc
+XCURSOR_TOC = struct.Struct('<LLL') # type, subtype (nominal size), position
+XCURSOR_CHUNK_HEADER = struct.Struct('<LLLLLLLLL') # header size, type, subtype, version, width, height, xhot, yhot, delay
+XCURSOR_DEFAULT_DELAY = 50 # what xcursorgen uses when a config line has no delay
+
+def premultiply(rgba):
+	# RGBA bytes to the premultiplied ARGB words of an Xcursor image, rounded like xcursorgen
+	def div_255(x):
+		return ((x + 0x80) + ((x + 0x80) >> 8)) >> 8
+	pixels = []
+	for i in range(0, len(rgba), 4):
+		red, green, blue, alpha = rgba[i:i+4]
+		if alpha != 255:
+			red, green, blue = div_255(red * alpha), div_255(green * alpha), div_255(blue * alpha)
+		pixels.append(alpha << 24 | red << 16 | green << 8 | blue)
+	return struct.pack('<{}L'.format(len(pixels)), *pixels)
+
+def encode_xcursor(frames):
+	# frames: dicts with size, xhot, yhot, width, height, rgba and delay, in file order
+	# Same layout xcursorgen writes: header, table of contents, one image chunk per frame
+	position = XCURSOR_FILE_HEADER.size + XCURSOR_TOC.size * len(frames)
+	toc = []
+	chunks = []
+	for frame in frames:
+		chunk = XCURSOR_CHUNK_HEADER.pack(XCURSOR_CHUNK_HEADER.size, XCURSOR_IMAGE_TYPE, frame['size'], XCURSOR_IMAGE_VERSION,
+			frame['width'], frame['height'], frame['xhot'], frame['yhot'], frame['delay']) + premultiply(frame['rgba'])
+		toc.append(XCURSOR_TOC.pack(XCURSOR_IMAGE_TYPE, frame['size'], position))
+		chunks.append(chunk)
+		position += len(chunk)
+	header = XCURSOR_FILE_HEADER.pack(XCURSOR_MAGIC, XCURSOR_FILE_HEADER.size, XCURSOR_VERSION, len(frames))
+	return header + b''.join(toc) + b''.join(chunks)
+
+def cursor_frame(icon, delay):
+	width, height, rgba = cursor_image(icon['ico_file'])
+	return {
+		'size'   : icon['rtIconDirEntry']['bHeight'],
+		'xhot'   : icon['rtIconDirEntry']['wPlanes'],
+		'yhot'   : icon['rtIconDirEntry']['wBitCount'],
+		'width'  : width,
+		'height' : height,
+		'rgba'   : rgba,
+		'delay'  : delay
+	}
+
+RIFF_HEADER = struct.Struct('<4sL') # chunk id, chunk size
+ANIH = struct.Struct('<LLLLLLLLL')
+ANIH_FIELDS = ['cbSize', 'nFrames', 'nSteps', 'iWidth', 'iHeight', 'iBitCount', 'nPlanes', 'iDispRate', 'bfAttributes']
+ICONDIR = struct.Struct('<HHH') # res, ico_type, ico_num_images
+ICONDIRENTRY = struct.Struct('<BBBBHHLL') # first entry only, the one holding the hotspot
+
+def riff_chunks(view, start, end):
+	# Yields (chunk id, data start, data end) of the chunks in view[start:end]
+	# Chunks are padded to even sizes, truncated chunks are clipped to the end
+	while start + RIFF_HEADER.size <= end:
+		ckID, ckSize = RIFF_HEADER.unpack_from(view, start)
+		data_start = start + RIFF_HEADER.size
+		data_end = min(data_start + ckSize, end)
+		yield ckID.decode('latin-1'), data_start, data_end
+		start = data_start + ckSize + (ckSize % 2) # Yay DWORD boundaries
+
+def riff_dwords(view, start, end):
+	# rate and seq chunks: little endian DWORDs, without a copy per value
+	dwords = array.array('I')
+	dwords.frombytes(view[start:start + (end - start) // 4 * 4])
+	if sys.byteorder == 'big':
+		dwords.byteswap()
+	return dwords
+
+def ani_frames(view, start, end):
+	# Lazily yields the icon chunks of a LIST fram as frames sharing the file's memory
+	index = 0
+	for ckID, data_start, data_end in riff_chunks(view, start, end):
+		if ckID == 'icon':
+			ico_file = view[data_start:data_end]
+			res, ico_type, ico_num_images = ICONDIR.unpack_from(ico_file, 0)
+			bWidth, bHeight, bColorCount, bReserved, wPlanes, wBitCount, dwBytesInRes, dwDIBOffset = ICONDIRENTRY.unpack_from(ico_file, ICONDIR.size)
+			yield {
+				'index' : index,
+				#ICONDIR
+				'rtIconDir' : {
+				'res' : res,
+				'ico_type' : ico_type,
+				'ico_num_images' : ico_num_images
+				},
+				#ICONDIRENTRY
+				'rtIconDirEntry' : {
+				'bWidth'       : bWidth, # Width, in pixels, of the image
+				'bHeight'      : bHeight, # Height, in pixels, of the image
+				'bColorCount'  : bColorCount, # Number of colors in image (0 if >=8bpp)
+				'bReserved'    : bReserved, # Reserved
+				'wPlanes'      : wPlanes, # Color Planes (or hotspot X coords for cur)
+				'wBitCount'    : wBitCount, # Bits per pixel (or hotspot Y coords for cur)
+				'dwBytesInRes' : dwBytesInRes, # how many bytes in this resource?
+				'dwDIBOffset'  : dwDIBOffset # where the image starts
+				},
+				'ico_file' : ico_file
+			}
+		index += 1
+
+def extract_ani(file_name):
+	print("\tParsing ani file {}".format(file_name))
+	f = open(file_name,'rb')
+	try:
+		ani_bytes = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+	except ValueError: # empty file
+		ani_bytes = memoryview(b'')
+	f.close()
+
+	rate = False
+	seq = False
+	INFO = False
+	anih = False
+	icon = []
+
+	print("{:<21} | Extracting cursors/icons from ani file: {}".format("", file_name))
+
+	if len(ani_bytes) >= 12:
+		ckID, ckSize = RIFF_HEADER.unpack_from(ani_bytes, 0)
+		ckID = ckID.decode('latin-1')
+		ckForm = bytes(ani_bytes[8:12]).decode('latin-1')
+	else:
+		ckID = ckSize = ckForm = None
+
+	# ANI files are just RIFF files
+	if ckID == 'RIFF':
+		print("{:<21} | {} ckSize :{}".format("","RIFF detected", ckSize))
+		if ckForm == 'ACON': #ACON is optional
+			total_size = 12 # RIFF Header with ACON
+		else:
+			total_size = 8 # RIFF Header without ACON
+
+		if ckSize == len(ani_bytes) - 8:
+			ckSize = ckSize + 8 # Sometimes, but not always, the header isn't included in ckSize
+			print("{:<21} | Adjusting ckSize to actual file size: {}".format("",ckSize))
+
+		for section, start, end in riff_chunks(ani_bytes, total_size, min(ckSize, len(ani_bytes))):
+			chunk_size = end - start
+			if section == 'anih' and chunk_size >= ANIH.size: #ANI Header
+				print("{:<21} | Chunk: anih".format(""))
+				# iDispRate is expressed in 1/60th-of-a-second units, which are known as jiffie, ignored if seq exists
+				# bfAttributes: 1 == CUR or ICO, 0 == BMP, 3 == 'seq' block is present
+				anih = dict(zip(ANIH_FIELDS, ANIH.unpack_from(ani_bytes, start)))
+			elif section == 'rate':
+				print("{:<21} | Chunk: rate, size: {}".format("", chunk_size))
+				rate = riff_dwords(ani_bytes, start, end)
+			elif section == 'seq ':
+				print("{:<21} | Chunk: seq, size: {}".format("",chunk_size))
+				seq = riff_dwords(ani_bytes, start, end)
+			elif section == 'LIST' and chunk_size >= 4:
+				chunk_type = bytes(ani_bytes[start:start+4]).decode('latin-1')
+				print("{:<21} | Chunk: {}, size: {}".format("",chunk_type, chunk_size))
+				if chunk_type == 'INFO':
+					INFO = {}
+					for info_section, info_start, info_end in riff_chunks(ani_bytes, start + 4, end):
+						value = bytes(ani_bytes[info_start:info_end])
+						try:
+							INFO[info_section] = value.decode()
+						except UnicodeDecodeError:
+							INFO[info_section] = value.decode('latin-1')
+				elif chunk_type == 'fram':
+					for frame in ani_frames(ani_bytes, start + 4, end):
+						print("{:<21} | Chunk: icon, index: {}".format("", frame['index']))
+						icon.append(frame)
+
+	else:
+		print("No RIFF ID, is {} an ANI file?".format(file_name))
+		print("{:<21} | RIFF ID: {}, Form: {}".format("", ckID, ckForm))
+
+
+	if INFO:
+		for i in INFO:
+			print("{:<21} | {:<21} | {}".format("",i, INFO[i]))
+	if anih: 
+		for i in anih:
+			print("{:<21} | {:<21} | {}".format("",i, anih[i]))
+	for section in icon:
+			if section['index']:
+				print("{:<21} | Index: {}".format("",section['index']))
+				print("{:<21} | rtIconDir".format(""))
+				for j in section['rtIconDir']:
+					print("{:<21} | {:<21} | {}".format("",j, section['rtIconDir'][j]))
+				print("{:<21} | rtIconDirEntry".format(""))
+				for j in section['rtIconDirEntry']:
+					print("{:<21} | {:<21} | {}".format("",j, section['rtIconDirEntry'][j]))
+
+	cursor = {
+		'INFO' : INFO,
+		'anih' : anih,
+		'seq'  : seq,
+		'rate' : rate,
+		'icon' : icon 
+	}
+
+	return cursor
+
+
+LINUX_TYPES = ['xcursors', 'qt', 'fd', 'gdk', 'hashes']
+
+CURSOR_NAME = re.compile(r'^[A-Za-z0-9_.+-]+$') # every name ends up as a file name in cursors/
+
+def load_cursor_table(file_name):
+	# Parse and validate cursors.ini into {cursor: {'name', 'Windows Default', <linux types>}}
+	# Raises ValueError listing every problem, not just the first
+	config = configparser.ConfigParser(interpolation=None)
+	try:
+		f = open(file_name)
+		config.read_file(f)
+		f.close()
+	except (OSError, configparser.Error) as e:
+		raise ValueError("{}: {}".format(file_name, e))
+	problems = []
+	cursors = {}
+	owner = {}
+	for cursor in config.sections():
+		entry = config[cursor]
+		if not CURSOR_NAME.match(cursor):
+			problems.append("[{}]: not usable as a source file name".format(cursor))
+		for key in entry:
+			if key not in ['name', 'windows_default'] + LINUX_TYPES:
+				problems.append("[{}]: unknown key {}".format(cursor, key))
+		try:
+			windows_default = entry.getboolean('windows_default')
+		except ValueError:
+			windows_default = None
+		if windows_default is None:
+			problems.append("[{}]: windows_default must be yes or no".format(cursor))
+		info = {'name': entry.get('name', cursor), 'Windows Default': windows_default}
+		for linux_type in LINUX_TYPES:
+			info[linux_type] = entry.get(linux_type, '').split()
+			for output in info[linux_type]:
+				if not CURSOR_NAME.match(output):
+					problems.append("[{}]: bad name {!r} in {}".format(cursor, output, linux_type))
+				elif owner.setdefault(output, cursor) != cursor:
+					problems.append("[{}]: {} is already listed by [{}]".format(cursor, output, owner[output]))
+		cursors[cursor] = info
+	if problems:
+		raise ValueError("{}:\n\t{}".format(file_name, "\n\t".join(problems)))
+	return cursors
+
+def alias_index(cursors):
+	# name -> (cursor, built file) for every name, in build order
+	# Shared by the build and --check, so both resolve aliases the same way
+	index = {}
+	for cursor in cursors:
+		primary = None
+		for linux_type in LINUX_TYPES:
+			for output in cursors[cursor][linux_type]:
+				primary = primary or output
+				index.setdefault(output, (cursor, primary))
+	return index
+
+def cursor_outputs(index):
+	# cursor -> names built for it: the first is the real file, the others link to it
+	outputs = {}
+	for output, (cursor, primary) in index.items():
+		outputs.setdefault(cursor, []).append(output)
+	return outputs
+
+def is_xcursor(path):
+	f = open(path, 'rb')
+	magic = f.read(4)
+	f.close()
+	return magic == XCURSOR_MAGIC
+
+def check_variant(tree, index):
+	# Install-time check: every name of the table is in cursors/ and resolves to its cursor
+	cursors_dir = os.path.join(tree, 'cursors')
+	problems = []
+	for output, (cursor, primary) in index.items():
+		path = os.path.join(cursors_dir, output)
+		if not os.path.lexists(path):
+			problems.append("missing {} (from {})".format(output, cursor))
+		elif os.path.islink(path) and (output == primary or os.readlink(path) != primary):
+			problems.append("{} links to {}, expected {}".format(output, os.readlink(path), 'a file' if output == primary else primary))
+		elif not os.path.exists(path) or not is_xcursor(path):
+			problems.append("{} is not an Xcursor file".format(output))
+	if os.path.isdir(cursors_dir):
+		for name in sorted(set(os.listdir(cursors_dir)) - set(index)):
+			problems.append("{} is not in the cursor table".format(name))
+	return problems
+
+def replace_output(path):
+	if os.path.lexists(path):
+		os.remove(path)
+
+def write_manifest(manifest, file_name):
+	# alias -> built file for every name in cursors/, one per line
+	f = open(file_name, 'w')
+	f.write("# Generated by cursor_builder.py: <name> <file in cursors/> <source cursor>\n")
+	for output, target, cursor in manifest:
+		f.write("{} {} {}\n".format(output, target, cursor))
+	f.close()
+
+def find_source(tree, cursor, info):
+	# Windows Default cursors come from build/95, the others from build/xcursors
+	folder = '95' if info['Windows Default'] else 'xcursors'
+	for ext in ['.cur', '.ani', '.ico']:
+		path = os.path.join(tree, 'build', folder, cursor+ext)
+		if os.path.exists(path):
+			return path, ext
+	print("{icon}.cur/{icon}.ani/{icon}.ico could not be found. Please place one of {icon}.cur/{icon}.ani/{icon}.ico in {folder}".format(icon=cursor,folder=os.path.join(tree, 'build', folder)))
+	return None, None
+
+def parse_source(path, ext):
+	if ext in ['.ico', '.cur']:
+		return extract_cur(path)
+	return extract_ani(path)
+
+def decode_frames(name, ext, config, skip_first):
+	# The frames of a parsed source, pixels decoded, in display order
+	if ext in ['.ico', '.cur']:
+		frame = cursor_frame(config['icon'][0], XCURSOR_DEFAULT_DELAY)
+		print("\tDecoded {}: {size} {xhot} {yhot}".format(name, **frame))
+		return [frame]
+
+	ani_file_config = config
+	#pprint(ani_file_config)
+	print("{:<21} | Header - nFrames: {}, nSteps: {}, iDispRate: {}".format(name, ani_file_config['anih']['nFrames'], ani_file_config['anih']['nSteps'], ani_file_config['anih']['iDispRate']))
+	frames = []
+
+	if ani_file_config['seq']:
+		# Steps reuse frames: index them once and decode each frame the first time a step shows it
+		icons = {icon['index'] : icon for icon in ani_file_config['icon']}
+		decoded = {}
+		for step, sequence in enumerate(ani_file_config['seq']):
+			# rate has one entry per step, not per frame
+			if ani_file_config['rate'] and step < len(ani_file_config['rate']):
+				rate = ani_file_config['rate'][step] * 17
+			else:
+				rate = ani_file_config['anih']['iDispRate'] * 17
+
+			if sequence not in icons:
+				print("{:<21} | Sequence: {}, no such frame, skipped".format(name, sequence))
+				continue
+			if sequence not in decoded:
+				decoded[sequence] = cursor_frame(icons[sequence], rate)
+			frame = dict(decoded[sequence], delay=rate)
+			print("{:<21} | Sequence: {}, rate: {}, size: {size}, xhot: {xhot}, yhot: {yhot}".format(name, sequence, rate, **frame))
+			frames.append(frame)
+	else:
+		itericons = iter(ani_file_config['icon'])			
+		# This is just for the default windows icons, no idea why
+		if skip_first:
+			next(itericons)
+		for icon in itericons:
+			rate = ani_file_config['anih']['iDispRate'] * 17
+			frame = cursor_frame(icon, rate)
+			print("{:<21} |  Sequence: {}, rate: {}, size: {size}, xhot: {xhot}, yhot: {yhot}".format(name, icon['index'], rate, **frame))
+			frames.append(frame)
+	return frames
+
+def source_frames(path, ext, skip_first):
+	return decode_frames(os.path.basename(path), ext, parse_source(path, ext), skip_first)
+
+# Nominal sizes written into every cursor file, so Xcursor finds a native size on scaled displays
+CURSOR_SIZES = [24, 32, 48, 64]
+
+def scale_rgba(rgba, width, height, new_width, new_height):
+	# Nearest neighbor: every pixel is copied whole, so pixel art edges stay crisp
+	rows = [rgba[y * width * 4:(y + 1) * width * 4] for y in range(height)]
+	columns = [(x * width // new_width) * 4 for x in range(new_width)]
+	scaled_rows = {}
+	out = []
+	for y in range(new_height):
+		source_y = y * height // new_height
+		if source_y not in scaled_rows:
+			row = rows[source_y]
+			scaled_rows[source_y] = b''.join(row[c:c+4] for c in columns)
+		out.append(scaled_rows[source_y])
+	return b''.join(out)
+
+def sized_frames(frames, sizes):
+	# All frames at each nominal size, size by size, the order libXcursor reads animations in
+	# Frames repeated by an ANI sequence share their pixels, so each is scaled once per size
+	scaled = {}
+	out = []
+	for size in sizes:
+		for frame in frames:
+			nominal = frame['size'] or frame['height']
+			if size == nominal:
+				out.append(frame)
+				continue
+			width = max(1, frame['width'] * size // nominal)
+			height = max(1, frame['height'] * size // nominal)
+			key = (id(frame['rgba']), width, height)
+			if key not in scaled:
+				scaled[key] = scale_rgba(frame['rgba'], frame['width'], frame['height'], width, height)
+			out.append(dict(frame, size=size, width=width, height=height, rgba=scaled[key],
+				xhot=min(frame['xhot'] * size // nominal, width - 1),
+				yhot=min(frame['yhot'] * size // nominal, height - 1)))
+	return out
+
+def build_source(job):
+	# Pool worker: decode one source file and encode it as an Xcursor
+	# Returns the file bytes and the parse log, kept together so parallel logs don't interleave
+	path, ext, skip_first, sizes = job
+	log = io.StringIO()
+	with contextlib.redirect_stdout(log):
+		data = encode_xcursor(sized_frames(source_frames(path, ext, skip_first), sizes))
+	return job, data, log.getvalue()
+
+def plan_variant(tree, cursors, index):
+	# What one theme needs: (cursor, outputs, source key) per cursor to build
+	# The key is the source content, so files shared by several variants are built once
+	plan = []
+	missing = []
+	outputs_of = cursor_outputs(index)
+	for cursor in cursors:
+		outputs = outputs_of.get(cursor)
+		if not outputs:
+			continue
+		path, ext = find_source(tree, cursor, cursors[cursor])
+		if not path:
+			missing.append(cursor)
+			continue
+		f = open(path, 'rb')
+		digest = hashlib.sha1(f.read()).hexdigest()
+		f.close()
+		plan.append((cursor, outputs, (digest, ext), path))
+	return plan, missing
+
+# Bump whenever the bytes written for the same source change, so cached cursors get rebuilt
+BUILDER_VERSION = 2
+CACHE_FILE = os.path.join('build', 'cache.json')
+
+def cache_entry(outputs, key, options):
+	# Everything a cursor's files depend on: source content, the names it owns, '-s' and the sizes
+	return {'source': key[0], 'ext': key[1], 'skip_first': options['skip_first'], 'sizes': options['sizes'], 'outputs': outputs}
+
+def load_cache(tree):
+	try:
+		f = open(os.path.join(tree, CACHE_FILE))
+		cache = json.load(f)
+		f.close()
+	except (OSError, ValueError):
+		return {}
+	if not isinstance(cache, dict) or cache.get('version') != BUILDER_VERSION:
+		return {}
+	return cache.get('cursors', {})
+
+def save_cache(tree, entries):
+	path = os.path.join(tree, CACHE_FILE)
+	f = open(path + '.tmp', 'w')
+	json.dump({'version': BUILDER_VERSION, 'cursors': entries}, f, indent=1, sort_keys=True)
+	f.close()
+	os.replace(path + '.tmp', path)
+
+def outputs_in_place(cursors_dir, outputs):
+	# The built file is a regular file and every alias still links to it
+	primary = os.path.join(cursors_dir, outputs[0])
+	if not os.path.isfile(primary) or os.path.islink(primary):
+		return False
+	for output in outputs[1:]:
+		link = os.path.join(cursors_dir, output)
+		if not os.path.islink(link) or os.readlink(link) != outputs[0]:
+			return False
+	return True
+
+def stale_cursors(tree, plan, cache, options):
+	# Cursors whose cache entry doesn't match or whose files were touched since
+	cursors_dir = os.path.join(tree, 'cursors')
+	stale = set()
+	for cursor, outputs, key, path in plan:
+		if cache.get(cursor) != cache_entry(outputs, key, options) or not outputs_in_place(cursors_dir, outputs):
+			stale.add(cursor)
+	return stale
+
+def prune_variant(tree, index):
+	# Remove whatever cursors/ holds that the table doesn't name: cursors dropped from the
+	# table, names a cursor no longer lists, files of older builds under renamed names
+	cursors_dir = os.path.join(tree, 'cursors')
+	pruned = []
+	if os.path.isdir(cursors_dir):
+		for name in sorted(os.listdir(cursors_dir)):
+			if name not in index:
+				os.remove(os.path.join(cursors_dir, name))
+				pruned.append(name)
+	return pruned
+
+def write_variant(tree, plan, built, stale, options):
+	cursors_dir = os.path.join(tree, 'cursors')
+	os.makedirs(cursors_dir, exist_ok=True)
+	manifest = []
+	entries = {}
+	for cursor, outputs, key, path in plan:
+		primary = outputs[0]
+		if cursor in stale:
+			replace_output(os.path.join(cursors_dir, primary))
+			f = open(os.path.join(cursors_dir, primary), 'wb')
+			f.write(built[key])
+			f.close()
+			for output in outputs[1:]:
+				replace_output(os.path.join(cursors_dir, output))
+				os.symlink(primary, os.path.join(cursors_dir, output))
+		manifest.append((primary, primary, cursor))
+		for output in outputs[1:]:
+			manifest.append((output, primary, cursor))
+		entries[cursor] = cache_entry(outputs, key, options)
+	write_manifest(manifest, os.path.join(tree, 'aliases.txt'))
+	save_cache(tree, entries)
+	return manifest
+
+VARIANTS = ['Chicago95_Standard_Cursors', 'Chicago95_Standard_Cursors_Black']
+
+def main(args):
+	# usage: cursor_builder.py [-s] [-f] [-j JOBS] [--sizes 24,32,48,64] [theme dir ...]
+	#        cursor_builder.py --check [theme dir ...]
+	# Without theme dirs every variant in VARIANTS is built
+	options = {'skip_first': '-s' in args, 'sizes': CURSOR_SIZES}
+	force = '-f' in args
+	check = '--check' in args
+	jobs = os.cpu_count() or 1
+	trees = []
+	i = 0
+	while i < len(args):
+		if args[i] == '-j':
+			jobs = max(1, int(args[i+1]))
+			i += 1
+		elif args[i] == '--sizes':
+			options['sizes'] = sorted(set(int(size) for size in args[i+1].split(',')))
+			i += 1
+		elif args[i] not in ['-s', '-f', '--check']:
+			trees.append(os.path.abspath(args[i]))
+		i += 1
+	if not trees:
+		here = os.path.dirname(os.path.abspath(__file__))
+		trees = [os.path.join(here, variant) for variant in VARIANTS]
+
+	try:
+		cursors = load_cursor_table(CURSOR_TABLE)
+	except ValueError as e:
+		print("Invalid cursor table {}".format(e))
+		sys.exit(1)
+	index = alias_index(cursors)
+
+	if check:
+		failed = False
+		for tree in trees:
+			problems = check_variant(tree, index)
+			for problem in problems:
+				print("{}: {}".format(os.path.basename(tree), problem))
+			print("{}: {} names checked, {} problems".format(os.path.basename(tree), len(index), len(problems)))
+			failed = failed or bool(problems)
+		sys.exit(1 if failed else 0)
+
+	start = time.monotonic()
+	plans = {}
+	stale = {}
+	pruned = {}
+	sources = {}
+	for tree in trees:
+		plans[tree], missing = plan_variant(tree, cursors, index)
+		for cursor in missing:
+			print("{}: no source for {}, skipped".format(os.path.basename(tree), cursor))
+		cache = {} if force else load_cache(tree)
+		stale[tree] = stale_cursors(tree, plans[tree], cache, options)
+		pruned[tree] = prune_variant(tree, index)
+		for cursor, outputs, key, path in plans[tree]:
+			if cursor in stale[tree]:
+				sources.setdefault(key, (path, key[1], options['skip_first'], tuple(options['sizes'])))
+
+	built = {}
+	jobs_list = list(sources.items())
+	if jobs > 1 and len(jobs_list) > 1:
+		pool = multiprocessing.Pool(min(jobs, len(jobs_list)))
+		results = pool.imap_unordered(build_source, [job for key, job in jobs_list])
+	else:
+		pool = None
+		results = map(build_source, [job for key, job in jobs_list])
+	keys = {job: key for key, job in jobs_list}
+	for job, data, log in results:
+		print("Cursor source: {}".format(job[0]))
+		print(log, end='')
+		built[keys[job]] = data
+	if pool:
+		pool.close()
+		pool.join()
+
+	for tree in trees:
+		manifest = write_variant(tree, plans[tree], built, stale[tree], options)
+		print("{}: {} cursors ({} rebuilt, {} unchanged), {} names, {} pruned in {}".format(os.path.basename(tree), len(plans[tree]), len(stale[tree]),
+			len(plans[tree]) - len(stale[tree]), len(manifest), len(pruned[tree]), os.path.join(tree, 'cursors')))
+	print("Built {} unique sources for {} themes in {:.2f}s with {} jobs".format(len(built), len(trees), time.monotonic() - start, jobs))
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
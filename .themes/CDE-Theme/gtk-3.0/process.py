@@ -3,11 +3,24 @@
 #/*version 3*/
 import re
 import os
-with open('widgets.jos.css') as f:lines=f.read().splitlines() 
-#with open('widgets.jos.1.css') as f:lines=f.read().splitlines() 
+import sys
+import time
+import shutil
+import subprocess
 
-print('process...')
-print(os.getcwd())
+USAGE='''usage:
+   ./process.py                      expand widgets.jos.css into widgets.css once
+   ./process.py --watch              rebuild whenever widgets.jos.css changes
+   ./process.py --watch --sync-themes --hook 'xfce4-panel -r'
+
+--sync-themes copies the new widgets.css into the generated ../../CDE-*/gtk-3.0;
+  themes generated with --gresource keep loading their old gtk.gresource, run
+  generate-all-themes.py --gresource again for those
+--hook runs a shell command after every rebuild'''
+
+SOURCE='widgets.jos.css'
+TARGET='widgets.css'
+POLL_INTERVAL=0.05
 
 dialog='GtkDialog'
 messagedialog='GtkMessageDialog'
@@ -15,130 +28,197 @@ popover='GtkPopover'
 viewport='GtkViewPort'
 treeview='GtkTreeView'
 menu='GtkMenu'
-if re.search('3.20',os.getcwd()):
-    print('3.20')
+#this directory used to be gtk-3.20, the old class names are only for 3.16
+if not re.search('3.16',os.getcwd()):
     dialog='dialog'
     messagedialog='messagedialog'
     popover='popover'
     viewport='viewport'
     treeview='treeview'
     menu='menu'
-else:
-    print('3.16')
-
-with open('widgets.css', 'w') as f: 
-
-    #these are the normal defs
-    for l in lines:
-        m=re.sub('_dialog','',l)
-        m=re.sub('_borderwidth','1px',m)
-        f.write(m)
-        f.write('/n')
-
-    f.write("""/* Portion for green pop messagedialog ********************* *//n """)
-
-    #these are the same ones inside a dialog
-    for l in lines:
-        m=re.sub('_dialog',messagedialog,l)
-        m=re.sub('bg_gen','bg_menu',m)
-        m=re.sub('ts_gen','ts_menu',m)
-        m=re.sub('bs_gen','bs_menu',m)
-        m=re.sub('sel_gen','sel_menu',m)
-        m=re.sub('fg_gen','fg_menu',m)
-        m=re.sub('_borderwidth','1px',m)
-        m=re.sub('colorset5','colorset6',m)
-        f.write(m)
-        f.write('/n')
-
-    #hmm not possible: viewports ar also used for non text
-    #f.write("""/* Portion for viewport ********************* *//n """)
-    #these are the same ones inside popover
-    #for l in lines:
-        #m=re.sub('_dialog',viewport,l)
-        #m=re.sub('bg_gen','bg_text',m)
-        #m=re.sub('ts_gen','ts_text',m)
-        #m=re.sub('bs_gen','bs_text',m)
-        #m=re.sub('sel_gen','sel_text',m)
-        #m=re.sub('fg_gen','fg_text',m)
-        #m=re.sub('_borderwidth','1px',m)
-        #m=re.sub('colorset5','colorset4',m)
-        ##########green combobut inside tree stays green
-        #########m=re.sub('colorset6','colorset4',m)
-        #f.write(m)
-        #f.write('/n')
-
-    f.write("""/* Portion for treeview ********************* *//n """)
-
-    #these are the same ones inside popover
-    for l in lines:
-        m=re.sub('_dialog',treeview,l)
-        m=re.sub('bg_gen','bg_text',m)
-        m=re.sub('ts_gen','ts_text',m)
-        m=re.sub('bs_gen','bs_text',m)
-        m=re.sub('sel_gen','sel_text',m)
-        m=re.sub('fg_gen','fg_text',m)
-        m=re.sub('_borderwidth','1px',m)
-        m=re.sub('colorset5','colorset4',m)
-        #green combobut inside tree stays green
-        #########m=re.sub('colorset6','colorset4',m)
-        f.write(m)
-        f.write('/n')
-
-    f.write("""/* Portion for green pop popover ********************* *//n """)
-
-    #these are the same ones inside popover
-    for l in lines:
-        m=re.sub('_dialog',popover,l)
-        m=re.sub('bg_gen','bg_menu',m)
-        m=re.sub('ts_gen','ts_menu',m)
-        m=re.sub('bs_gen','bs_menu',m)
-        m=re.sub('sel_gen','sel_menu',m)
-        m=re.sub('fg_gen','fg_menu',m)
-        m=re.sub('_borderwidth','1px',m)
-        m=re.sub('colorset5','colorset6',m)
-        f.write(m)
-        f.write('/n')
-
-    f.write("""/* Portion for green pop up dialogs ********************* *//n """)
-
-    for l in lines:
-        m=re.sub('_dialog',dialog,l)
-        m=re.sub('bg_gen','bg_menu',m)
-        m=re.sub('ts_gen','ts_menu',m)
-        m=re.sub('bs_gen','bs_menu',m)
-        m=re.sub('sel_gen','sel_menu',m)
-        m=re.sub('fg_gen','fg_menu',m)
-        m=re.sub('_borderwidth','1px',m)
-        m=re.sub('colorset5','colorset6',m)
-        f.write(m)
-        f.write('/n')
-
-    f.write("""/* Portion for green pop up menu ********************* *//n """)
 
+gen_to_menu=[('bg_gen','bg_menu'),('ts_gen','ts_menu'),('bs_gen','bs_menu'),
+             ('sel_gen','sel_menu'),('fg_gen','fg_menu')]
+gen_to_text=[('bg_gen','bg_text'),('ts_gen','ts_text'),('bs_gen','bs_text'),
+             ('sel_gen','sel_text'),('fg_gen','fg_text')]
+text_to_menu=[('bg_text','bg_menu'),('ts_text','ts_menu'),('bs_text','bs_menu'),
+              ('sel_text','sel_menu'),('fg_text','fg_menu')]
+
+#(portion header, substitutions applied to every line in order)
+#hmm not possible: viewports ar also used for non text, so no viewport portion
+VARIANTS=[
+    (None,
+     [('_dialog',''),('_borderwidth','1px')]),
+    ('/* Portion for green pop messagedialog ********************* */\n ',
+     [('_dialog',messagedialog)]+gen_to_menu+[('_borderwidth','1px'),('colorset5','colorset6')]),
+    #green combobut inside tree stays green
+    ('/* Portion for treeview ********************* */\n ',
+     [('_dialog',treeview)]+gen_to_text+[('_borderwidth','1px'),('colorset5','colorset4')]),
+    ('/* Portion for green pop popover ********************* */\n ',
+     [('_dialog',popover)]+gen_to_menu+[('_borderwidth','1px'),('colorset5','colorset6')]),
+    ('/* Portion for green pop up dialogs ********************* */\n ',
+     [('_dialog',dialog)]+gen_to_menu+[('_borderwidth','1px'),('colorset5','colorset6')]),
     #this actually works haha
     #but mainly for menu disabled text shadow maybe just put it in the css file
     #widget.css gets kindof long like this (13000)
-    for l in lines:
-        m=re.sub('_dialog',menu,l)
-        m=re.sub('bg_gen','bg_menu',m)
-        m=re.sub('ts_gen','ts_menu',m)
-        m=re.sub('bs_gen','bs_menu',m)
-        m=re.sub('sel_gen','sel_menu',m)
-        m=re.sub('fg_gen','fg_menu',m)
-        m=re.sub('bg_text','bg_menu',m)
-        m=re.sub('ts_text','ts_menu',m)
-        m=re.sub('bs_text','bs_menu',m)
-        m=re.sub('sel_text','sel_menu',m)
-        m=re.sub('fg_text','fg_menu',m)
-        m=re.sub('_borderwidth','1px',m)
-        m=re.sub('colorset5','colorset6',m)
-        f.write(m)
-        f.write('/n')
-
+    ('/* Portion for green pop up menu ********************* */\n ',
+     [('_dialog',menu)]+gen_to_menu+text_to_menu+[('_borderwidth','1px'),('colorset5','colorset6')]),
+]
 
 
-
-
-    f.write(m)
-    f.write('/n')
-
+def split_rules(lines):
+    """Split the source into rules: runs of lines closed by a top level '}'.
+    Comments and blank lines between rules stick to the following rule."""
+    rules=[]
+    current=[]
+    depth=0
+    for l in lines:
+        current.append(l)
+        depth+=l.count('{')-l.count('}')
+        if depth<=0 and '}' in l:
+            rules.append(tuple(current))
+            current=[]
+            depth=0
+    if current:
+        rules.append(tuple(current))
+    return rules
+
+
+def expand_rule(rule, subs):
+    out=[]
+    for l in rule:
+        m=l
+        for old,new in subs:
+            m=re.sub(old,new,m)
+        out.append(m+'\n')
+    return ''.join(out)
+
+
+class Expander:
+    """Keeps the expanded text of every rule from the last parse, so a rebuild
+    only re-expands the rules that changed since then."""
+
+    def __init__(self):
+        self.cache={}
+
+    def build(self, lines):
+        rules=split_rules(lines)
+        cache={}
+        changed=0
+        for rule in rules:
+            if rule in cache:
+                continue
+            if rule in self.cache:
+                cache[rule]=self.cache[rule]
+            else:
+                cache[rule]=[expand_rule(rule,subs) for header,subs in VARIANTS]
+                changed+=1
+        self.cache=cache
+        parts=[]
+        for i,(header,subs) in enumerate(VARIANTS):
+            if header:
+                parts.append(header)
+            for rule in rules:
+                parts.append(cache[rule][i])
+        #the last line of the menu portion has always been written twice
+        if lines:
+            parts.append(expand_rule(lines[-1:],VARIANTS[-1][1]))
+        return ''.join(parts),changed
+
+
+def write_atomic(path, text):
+    tmp=os.path.join(os.path.dirname(path) or '.','.'+os.path.basename(path)+'.tmp')
+    with open(tmp,'w') as f:
+        f.write(text)
+    os.replace(tmp,path)
+
+
+def sync_themes():
+    """Copy widgets.css into every generated CDE-* theme next to this one.
+    Returns (themes synced, themes whose gtk.gresource is now stale)."""
+    here=os.path.abspath('.')
+    gtkdir=os.path.basename(here)
+    theme_dir=os.path.dirname(here)
+    themes_dir=os.path.dirname(theme_dir)
+    count=0
+    stale=0
+    for name in sorted(os.listdir(themes_dir)):
+        dst_dir=os.path.join(themes_dir,name,gtkdir)
+        if not name.startswith('CDE-') or os.path.join(themes_dir,name)==theme_dir:
+            continue
+        if os.path.isdir(dst_dir) and not os.path.islink(dst_dir):
+            tmp=os.path.join(dst_dir,'.'+TARGET+'.tmp')
+            shutil.copyfile(TARGET,tmp)
+            os.replace(tmp,os.path.join(dst_dir,TARGET))
+            count+=1
+            if os.path.exists(os.path.join(dst_dir,'gtk.gresource')):
+                stale+=1
+    return count,stale
+
+
+def rebuild(expander, sync=False, hook=None):
+    start=time.monotonic()
+    with open(SOURCE) as f:lines=f.read().splitlines()
+    text,changed=expander.build(lines)
+    write_atomic(TARGET,text)
+    msg='%d changed rules, %s written' % (changed,TARGET)
+    if sync:
+        count,stale=sync_themes()
+        msg+=', %d themes synced' % count
+        if stale:
+            msg+=' (%d with a stale gtk.gresource, rerun generate-all-themes.py --gresource)' % stale
+    if hook:
+        subprocess.call(hook,shell=True)
+    print('%s in %.0f ms' % (msg,(time.monotonic()-start)*1000))
+
+
+def source_stamp():
+    try:
+        st=os.stat(SOURCE)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns,st.st_size,st.st_ino)
+
+
+def watch(sync=False, hook=None):
+    expander=Expander()
+    rebuild(expander,sync,hook)
+    stamp=source_stamp()
+    print('watching %s, ctrl-c to stop' % SOURCE)
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            new=source_stamp()
+            if new is None or new==stamp:
+                continue
+            stamp=new
+            try:
+                rebuild(expander,sync,hook)
+            except OSError as e:
+                print('rebuild failed: %s' % e)
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    args=sys.argv[1:]
+    sync='--sync-themes' in args
+    hook=None
+    if '--hook' in args:
+        i=args.index('--hook')+1
+        if i>=len(args):
+            print(USAGE)
+            sys.exit(1)
+        hook=args[i]
+
+    print('process...')
+    print(os.getcwd())
+
+    if '--watch' in args:
+        watch(sync,hook)
+    else:
+        rebuild(Expander(),sync,hook)
+
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+CDE backdrops in the colors of a palette.
+The backdrops in backdrops/CDE are XPM files (.pm for the CDE originals,
+.xpm for copies saved in fixed colors) whose colors are symbolic: the
+background, topShadowColor, bottomShadowColor and selectColor of the
+workspace's colorset, named by the `s` key or, in the cdemt files, by a
+ts_color/bs_color/... `m` key. dtsession draws them in the colors of the
+current palette; this module does the same and writes them as indexed PNGs.
+
+Usage:
+    python3 backdrop_tint.py --list                   # backdrops and their symbolic colors
+    python3 backdrop_tint.py <out dir> <background> <topShadow> <bottomShadow> <select> [backdrop ...]
+
+change-cde-colors.py --backdrops writes the backdrops of the palette it
+applies to .themes/CDE-Theme/backdrops, and generate-all-themes.py
+--backdrops those of every palette to CDE-<Palette>/backdrops, in the
+colors of colorset slot 7 (workspace 1).
+
+An XPM is parsed into one index byte per pixel and a color table; tinting
+only resolves the color table. The index plane is compressed into the IHDR
+and IDAT of an indexed PNG once per run (png_optimize.py picks the
+filters; encode_backdrops() does all backdrops in a process pool), and
+every palette then only writes its own PLTE and tRNS around them. Each
+output directory records the (backdrop hash, PLTE) of its PNGs in
+.backdrop-manifest.json, so a backdrop whose colors did not change is not
+written again.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import multiprocessing
+
+import png_optimize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKDROPS_DIR = os.path.join(SCRIPT_DIR, "backdrops", "CDE")
+MANIFEST = '.backdrop-manifest.json'
+BACKDROP_VERSION = 1
+# the colorset dtsession draws the backdrop of workspace 1 with
+WORKSPACE_SLOT = 7
+
+XPM_STRING = re.compile(rb'"([^"]*)"')
+COLOR_KEYS = (b'm', b's', b'g4', b'g', b'c')
+ROLES = ['bg', 'fg', 'ts', 'bs', 'sel']
+# symbolic color names, and the m values the cdemt files use instead, to colorset roles
+SYMBOLIC = {
+    b'background': 'bg', b'foreground': 'fg', b'topShadowColor': 'ts',
+    b'bottomShadowColor': 'bs', b'selectColor': 'sel',
+    b'bg_color': 'bg', b'fg_color': 'fg', b'ts_color': 'ts', b'bs_color': 'bs', b'sel_color': 'sel',
+}
+NAMED_COLORS = {b'white': (255, 255, 255, 255), b'black': (0, 0, 0, 255), b'none': (0, 0, 0, 0)}
+
+
+def parse_color_entry(spec):
+    """{key: value} of the keys (c, m, s, g, g4) of one XPM color line."""
+    entry = {}
+    key = None
+    for word in spec.split():
+        if word in COLOR_KEYS and (key is None or entry[key]):
+            key = word
+            entry[key] = b''
+        elif key is not None:
+            entry[key] = (entry[key] + b' ' + word).strip()
+    return entry
+
+
+def parse_xpm(data):
+    """(width, height, [color entries], index plane) of XPM `data`: one
+    index byte per pixel into the color entries, row after row."""
+    strings = XPM_STRING.findall(data)
+    if not strings:
+        raise ValueError("not an XPM file")
+    width, height, ncolors, cpp = (int(v) for v in strings[0].split()[:4])
+    if ncolors > 256:
+        raise ValueError(f"{ncolors} colors do not fit an indexed PNG")
+    codes = {}
+    entries = []
+    for i, line in enumerate(strings[1:1 + ncolors]):
+        codes[line[:cpp]] = i
+        entries.append(parse_color_entry(line[cpp:]))
+    rows = strings[1 + ncolors:1 + ncolors + height]
+    if len(rows) != height or any(len(row) != width * cpp for row in rows):
+        raise ValueError("truncated XPM pixels")
+    pixels = b''.join(rows)
+    if cpp == 1:
+        if pixels.translate(None, b''.join(codes)):
+            raise ValueError("pixel with an undefined color")
+        table = bytearray(256)
+        for code, i in codes.items():
+            table[code[0]] = i
+        return width, height, entries, pixels.translate(table)
+    try:
+        return width, height, entries, bytes(codes[pixels[i:i + cpp]] for i in range(0, len(pixels), cpp))
+    except KeyError:
+        raise ValueError("pixel with an undefined color")
+
+
+def parse_rgb(value):
+    """(r, g, b, a) of an X color: #rgb with 1 to 4 hex digits per channel,
+    white, black or None."""
+    if value.lower() in NAMED_COLORS:
+        return NAMED_COLORS[value.lower()]
+    digits = value[1:]
+    n = len(digits) // 3
+    if not value.startswith(b'#') or n not in (1, 2, 3, 4) or len(digits) != n * 3:
+        raise ValueError(f"unsupported color {value.decode(errors='replace')}")
+    channels = [int(digits[i:i + n], 16) for i in range(0, 3 * n, n)]
+    return tuple(round(c * 255 / ((1 << (4 * n)) - 1)) for c in channels) + (255,)
+
+
+def entry_role(entry):
+    """Colorset role of a color entry, or None for a fixed color."""
+    return SYMBOLIC.get(entry.get(b's')) or SYMBOLIC.get(entry.get(b'm'))
+
+
+def entry_color(entry, colors):
+    """(r, g, b, a) of a color entry with the roles colored from `colors`."""
+    role = entry_role(entry)
+    if role:
+        return parse_rgb(colors[role].encode())
+    for key in (b'c', b'g', b'g4', b'm'):
+        if key in entry:
+            return parse_rgb(entry[key])
+    raise ValueError("color entry without a color")
+
+
+def slot_colors(colorset, slot=WORKSPACE_SLOT):
+    """{role: '#rrggbb'} of one slot of compute_colorset()'s (bg, fg, ts, bs, sel)."""
+    return {role: colors[slot] for role, colors in zip(ROLES, colorset)}
+
+
+def palette_chunks(entries, colors):
+    """(PLTE, tRNS or None) payloads of the color entries."""
+    rgba = [entry_color(entry, colors) for entry in entries]
+    translucent = [i for i, c in enumerate(rgba) if c[3] != 255]
+    trns = bytes(c[3] for c in rgba[:translucent[-1] + 1]) if translucent else None
+    return b''.join(bytes(c[:3]) for c in rgba), trns
+
+
+def encode_indexed(width, height, plane, ncolors):
+    """(IHDR, IDAT) chunks of an index plane, at the smallest bit depth
+    `ncolors` allows. The palette is not part of them: the filters and the
+    deflate stream only see the indices."""
+    depth = next(d for d in (1, 2, 4, 8) if ncolors <= 1 << d)
+    layout = (png_optimize.INDEXED, depth, bytes(3 * ncolors), None,
+              png_optimize.pack_samples(plane, width, depth))
+    chunks = dict(png_optimize.read_chunks(png_optimize.smallest_png(width, height, [layout])))
+    return (png_optimize.write_chunk(b'IHDR', chunks[b'IHDR']),
+            png_optimize.write_chunk(b'IDAT', chunks[b'IDAT']))
+
+
+def with_palette(chunks, plte, trns):
+    """PNG of the (IHDR, IDAT) of encode_indexed() with a PLTE (and tRNS)."""
+    ihdr, idat = chunks
+    return (png_optimize.PNG_SIGNATURE + ihdr + png_optimize.write_chunk(b'PLTE', plte)
+            + (png_optimize.write_chunk(b'tRNS', trns) if trns else b'')
+            + idat + png_optimize.write_chunk(b'IEND', b''))
+
+
+def tint_backdrop(data, colors):
+    """PNG of XPM `data` with its symbolic colors taken from {role: '#rrggbb'}."""
+    width, height, entries, plane = parse_xpm(data)
+    return with_palette(encode_indexed(width, height, plane, len(entries)), *palette_chunks(entries, colors))
+
+
+_decode_cache = {}
+_encode_cache = {}
+
+
+def load_backdrop(path):
+    """(sha1, width, height, color entries, index plane) of an XPM file,
+    parsed once per run."""
+    if path not in _decode_cache:
+        with open(path, 'rb') as f:
+            data = f.read()
+        _decode_cache[path] = (hashlib.sha1(data).hexdigest(),) + parse_xpm(data)
+    return _decode_cache[path]
+
+
+def encoded_backdrop(path):
+    """(IHDR, IDAT) chunks of a backdrop, encoded once per run."""
+    if path not in _encode_cache:
+        digest, width, height, entries, plane = load_backdrop(path)
+        _encode_cache[path] = encode_indexed(width, height, plane, len(entries))
+    return _encode_cache[path]
+
+
+def _encode_job(path):
+    return path, encoded_backdrop(path)
+
+
+def encode_backdrops(paths, jobs=None):
+    """Encode the backdrops `paths` in a process pool, so that rendering
+    them in any number of palettes only writes palettes."""
+    todo = [path for path in paths if path not in _encode_cache]
+    if len(todo) > 1 and (jobs or os.cpu_count() or 1) > 1:
+        with multiprocessing.Pool(min(jobs or os.cpu_count(), len(todo))) as pool:
+            for path, chunks in pool.imap_unordered(_encode_job, todo):
+                _encode_cache[path] = chunks
+    for path in todo:
+        encoded_backdrop(path)
+
+
+def list_backdrops(backdrops_dir=BACKDROPS_DIR):
+    """{name: path} of the backdrops with symbolic colors. Where a .pm and
+    a fixed-color .xpm share a name, the .pm original is used."""
+    backdrops = {}
+    for fn in sorted(os.listdir(backdrops_dir)):
+        name, ext = os.path.splitext(fn)
+        if ext not in ('.pm', '.xpm') or (ext == '.xpm' and name in backdrops):
+            continue
+        path = os.path.join(backdrops_dir, fn)
+        try:
+            digest, width, height, entries, plane = load_backdrop(path)
+        except ValueError:
+            continue
+        if any(entry_role(entry) for entry in entries):
+            backdrops[name] = path
+    return backdrops
+
+
+def render_backdrops(out_dir, colors, names=None, backdrops_dir=BACKDROPS_DIR):
+    """Write <name>.png to `out_dir` for the backdrops `names` (default:
+    all) in `colors` ({role: '#rrggbb'}). Returns (written, unchanged)."""
+    backdrops = list_backdrops(backdrops_dir)
+    names = sorted(backdrops) if names is None else names
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != BACKDROP_VERSION:
+            manifest = {}
+    except (OSError, ValueError):
+        manifest = {}
+    previous = manifest.get('backdrops', {})
+
+    os.makedirs(out_dir, exist_ok=True)
+    rendered = {}
+    written = unchanged = 0
+    for name in names:
+        digest, width, height, entries, plane = load_backdrop(backdrops[name])
+        plte, trns = palette_chunks(entries, colors)
+        key = hashlib.sha1((digest + plte.hex() + (trns or b'').hex()).encode()).hexdigest()
+        path = os.path.join(out_dir, f"{name}.png")
+        rendered[name] = key
+        if previous.get(name) == key and os.path.isfile(path):
+            unchanged += 1
+            continue
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(with_palette(encoded_backdrop(backdrops[name]), plte, trns))
+        os.replace(tmp, path)
+        written += 1
+    previous.update(rendered)
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump({'version': BACKDROP_VERSION, 'backdrops': previous}, f, indent=1, sort_keys=True)
+    return written, unchanged
+
+
+def main():
+    args = sys.argv[1:]
+    if args == ['--list']:
+        for name, path in list_backdrops().items():
+            digest, width, height, entries, plane = load_backdrop(path)
+            roles = sorted(set(filter(None, (entry_role(e) for e in entries))), key=ROLES.index)
+            print(f"  {name:<14} {os.path.basename(path):<18} {width}x{height}  {' '.join(roles)}")
+        return
+    if len(args) < 5:
+        print(__doc__.strip())
+        sys.exit(1)
+    out_dir, background, top_shadow, bottom_shadow, select = args[:5]
+    colors = {'bg': background, 'fg': '#000000', 'ts': top_shadow, 'bs': bottom_shadow, 'sel': select}
+    backdrops = list_backdrops()
+    names = args[5:] or None
+    for name in names or []:
+        if name not in backdrops:
+            print(f"ERROR: no backdrop {name} in {BACKDROPS_DIR}")
+            sys.exit(1)
+    written, unchanged = render_backdrops(out_dir, colors, names)
+    print(f"Wrote {out_dir}: {written} backdrops ({unchanged} unchanged)")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ Usage:
     python3 change-cde-colors.py --custom R,G,B      # use a single custom color (0-255)
     python3 change-cde-colors.py --list               # list all available palettes
     python3 change-cde-colors.py --preview <palette>  # preview palette colors
+    python3 change-cde-colors.py --icons <palette>    # also tint the folder icons
+    python3 change-cde-colors.py --backdrops <palette>  # also render the CDE backdrops
 
 Examples:
     python3 change-cde-colors.py Crimson
@@ -23,6 +25,10 @@ import os
 import sys
 import re
 import glob
+import hashlib
+
+import icon_tint
+import backdrop_tint
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 THEME_DIR = os.path.join(SCRIPT_DIR, ".themes", "CDE-Theme")
@@ -58,6 +64,14 @@ XmCOLOR_LITE_THRESHOLD = XmDEFAULT_LIGHT_THRESHOLD * XmCOLOR_PERCENTILE
 XmCOLOR_DARK_THRESHOLD = XmDEFAULT_DARK_THRESHOLD * XmCOLOR_PERCENTILE
 XmFOREGROUND_THRESHOLD = XmDEFAULT_FOREGROUND_THRESHOLD * XmCOLOR_PERCENTILE
 
+# Structural templates scanned for colorset references. cdecolors.* is what
+# we generate, so it is never part of the analysis.
+GTK3_TEMPLATES = ["gtk.css", "colors.css", "widgets.css"]
+GTK2_TEMPLATES = ["gtkrc"]
+CSS_COLOR_REF = re.compile(r'@(bg|fg|ts|bs|sel)_color_([1-8])\b')
+RC_STYLE_REF = re.compile(r'"cde_style_(sel_)?([1-8])"')
+COLOR_ROLES = ['bg', 'fg', 'ts', 'bs', 'sel']
+
 HEX = '0123456789abcdef'
 HEXNUM = [4096, 256, 16, 1]
 
@@ -212,7 +226,42 @@ def read_palette_file(filepath):
     return lines[:8]
 
 
-def generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name):
+_usage_cache = {}
+
+
+def analyze_template_usage(template_dir, templates, pattern):
+    """Return the set of (role, slot) pairs the templates in template_dir use.
+
+    For CSS the role is one of COLOR_ROLES, for gtkrc it is 'style' or
+    'sel'.  Returns None when none of the templates exist, which tells the
+    renderers to emit every slot.  Results are cached by template hash.
+    """
+    h = hashlib.sha1()
+    found = False
+    for name in templates:
+        path = os.path.join(template_dir, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                h.update(name.encode() + b'\0' + f.read() + b'\0')
+            found = True
+    if not found:
+        return None
+    key = (pattern.pattern, h.hexdigest())
+    if key not in _usage_cache:
+        used = set()
+        for name in templates:
+            path = os.path.join(template_dir, name)
+            if os.path.isfile(path):
+                with open(path, 'r', errors='replace') as f:
+                    for role, slot in pattern.findall(f.read()):
+                        used.add((role.rstrip('_') or 'style', int(slot)))
+        _usage_cache[key] = frozenset(used)
+    return _usage_cache[key]
+
+
+def generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name, used=None):
+    """Render cdecolors.css; with `used` only the referenced colors are emitted."""
+    colors = {'bg': bg, 'fg': fg, 'ts': ts, 'bs': bs, 'sel': sel}
     lines = []
     lines.append("")
     lines.append(f"/*")
@@ -221,11 +270,11 @@ def generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name):
     lines.append(f"*/")
     lines.append("")
     for a in range(1, 9):
-        lines.append(f"@define-color bg_color_{a} {bg[a]}; ")
-        lines.append(f"@define-color fg_color_{a} {fg[a]}; ")
-        lines.append(f"@define-color ts_color_{a} {ts[a]}; ")
-        lines.append(f"@define-color bs_color_{a} {bs[a]}; ")
-        lines.append(f"@define-color sel_color_{a} {sel[a]}; ")
+        roles = [r for r in COLOR_ROLES if used is None or (r, a) in used]
+        if not roles:
+            continue
+        for r in roles:
+            lines.append(f"@define-color {r}_color_{a} {colors[r][a]}; ")
         lines.append("")
     lines.append("")
     lines.append("* {")
@@ -236,7 +285,8 @@ def generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name):
     return "\n".join(lines) + "\n"
 
 
-def generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name):
+def generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name, used=None):
+    """Render cdecolors.rc; with `used` only the referenced styles are emitted."""
     lines = []
     lines.append(f"#")
     lines.append(f"# Generated by change-cde-colors.py for palette {palette_name}")
@@ -252,6 +302,8 @@ def generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name):
     lines.append("    ")
 
     for a in range(1, 9):
+        if used is not None and ('style', a) not in used:
+            continue
         lines.append(f'style "cde_style_{a}"')
         lines.append("{")
         lines.append(f'    fg[NORMAL]  ="{fg[a]}"')
@@ -286,6 +338,8 @@ def generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name):
 
     # Also generate sel styles
     for a in range(1, 9):
+        if used is not None and ('sel', a) not in used:
+            continue
         lines.append(f'style "cde_style_sel_{a}"')
         lines.append("{")
         lines.append(f'    fg[NORMAL]  ="{fg[a]}"')
@@ -318,9 +372,9 @@ def generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name):
     return "\n".join(lines) + "\n"
 
 
-def generate_gtk4_colors_css(bg, fg, ts, bs, sel, palette_name):
+def generate_gtk4_colors_css(bg, fg, ts, bs, sel, palette_name, used=None):
     """GTK4 uses the same format as GTK3."""
-    return generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name)
+    return generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name, used)
 
 
 def find_palettes():
@@ -361,8 +415,10 @@ def preview_palette(bg, fg, ts, bs, sel, name):
     print()
 
 
-def apply_palette(palette_lines, palette_name):
-    """Apply a palette to the CDE theme files."""
+def apply_palette(palette_lines, palette_name, icons=False, backdrops=False):
+    """Apply a palette to the CDE theme files, with `icons` to the
+    Chicago95-tux-CDE overlay icon theme, and with `backdrops` to the
+    backdrop PNGs of CDE-Theme."""
     bg, fg, ts, bs, sel = compute_colorset(palette_lines)
 
     preview_palette(bg, fg, ts, bs, sel, palette_name)
@@ -372,7 +428,8 @@ def apply_palette(palette_lines, palette_name):
     if os.path.isdir(gtk3_dir):
         path = os.path.join(gtk3_dir, "cdecolors.css")
         with open(path, 'w') as f:
-            f.write(generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name))
+            used = analyze_template_usage(gtk3_dir, GTK3_TEMPLATES, CSS_COLOR_REF)
+            f.write(generate_gtk3_colors_css(bg, fg, ts, bs, sel, palette_name, used))
         print(f"  [OK] Written: {path}")
 
     # Write GTK4 cdecolors.css
@@ -380,7 +437,8 @@ def apply_palette(palette_lines, palette_name):
     if os.path.isdir(gtk4_dir):
         path = os.path.join(gtk4_dir, "cdecolors.css")
         with open(path, 'w') as f:
-            f.write(generate_gtk4_colors_css(bg, fg, ts, bs, sel, palette_name))
+            used = analyze_template_usage(gtk4_dir, GTK3_TEMPLATES, CSS_COLOR_REF)
+            f.write(generate_gtk4_colors_css(bg, fg, ts, bs, sel, palette_name, used))
         print(f"  [OK] Written: {path}")
 
     # Write GTK2 cdecolors.rc
@@ -388,15 +446,34 @@ def apply_palette(palette_lines, palette_name):
     if os.path.isdir(gtk2_dir):
         path = os.path.join(gtk2_dir, "cdecolors.rc")
         with open(path, 'w') as f:
-            f.write(generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name))
+            used = analyze_template_usage(gtk2_dir, GTK2_TEMPLATES, RC_STYLE_REF)
+            f.write(generate_gtk2_colors_rc(bg, fg, ts, bs, sel, palette_name, used))
         print(f"  [OK] Written: {path}")
 
+    if icons:
+        icon_dir = icon_tint.overlay_path("CDE")
+        written, hits = icon_tint.tint_theme(icon_dir, palette_name, bg)
+        print(f"  [OK] Written: {icon_dir} ({written} tinted icons)")
+        print(f"  Select the {os.path.basename(icon_dir)} icon theme in XFCE Settings > Appearance > Icons.")
+
+    if backdrops:
+        backdrop_dir = os.path.join(THEME_DIR, "backdrops")
+        colors = backdrop_tint.slot_colors((bg, fg, ts, bs, sel))
+        written, unchanged = backdrop_tint.render_backdrops(backdrop_dir, colors)
+        print(f"  [OK] Written: {backdrop_dir} ({written} backdrops, {unchanged} unchanged)")
+
     print(f"\n  Done! CDE theme colors changed to '{palette_name}'.")
     print(f"  Restart your XFCE session or switch away and back to the CDE theme to apply.\n")
 
 
 def main():
     palettes = find_palettes()
+    icons = '--icons' in sys.argv
+    if icons:
+        sys.argv.remove('--icons')
+    backdrops = '--backdrops' in sys.argv
+    if backdrops:
+        sys.argv.remove('--backdrops')
 
     if len(sys.argv) < 2 or sys.argv[1] == '--list':
         print("\nAvailable CDE Palettes:")
@@ -448,7 +525,7 @@ def main():
             new_v = min(1.0, v * vo)
             nr, ng, nb = colorsys.hsv_to_rgb(new_h, new_s, new_v)
             palette_lines.append(f"#{int(nr*255):02x}{int(ng*255):02x}{int(nb*255):02x}")
-        apply_palette(palette_lines, f"Custom({r},{g},{b})")
+        apply_palette(palette_lines, f"Custom({r},{g},{b})", icons, backdrops)
         return
 
     # Apply named palette
@@ -464,7 +541,7 @@ def main():
             return
 
     lines = read_palette_file(palettes[name])
-    apply_palette(lines, name)
+    apply_palette(lines, name, icons, backdrops)
 
 
 if __name__ == '__main__':
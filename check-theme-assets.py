@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Asset reference checker for the CDE themes.
+Indexes every url() in the loaded GTK3/GTK4 CSS and every pixmap in the
+GTK2 gtkrc of the base theme and all generated CDE-<Palette> themes, then
+reports missing, unused and duplicated image assets.
+
+Each asset folder is listed once (by real path, so the symlinked img/img2
+of the 131 generated themes share one listing) instead of a stat() per
+reference. Meant to run right after generate-all-themes.py.
+
+Usage:
+    python3 check-theme-assets.py              # base theme + all CDE-* themes
+    python3 check-theme-assets.py --base-only  # only .themes/CDE-Theme
+    python3 check-theme-assets.py --quiet      # only print the summary
+
+Exit status is 1 when a reference is missing.
+"""
+
+import os
+import sys
+import re
+import hashlib
+import posixpath
+
+import gresource
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+THEMES_DIR = os.path.join(SCRIPT_DIR, ".themes")
+BASE_THEME = os.path.join(THEMES_DIR, "CDE-Theme")
+
+# Folders of the base theme whose images are expected to be referenced.
+# xfwm4 is left out: xfwm4 picks its images by fixed file name.
+ASSET_DIRS = ['img', 'img2', 'gtk-2.0', 'gtk-3.0', 'gtk-4.0']
+IMAGE_EXTS = ('.png', '.xpm', '.svg', '.gif', '.jpg')
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_IMPORT = re.compile(r'@import\s+(?:url\(\s*)?["\']?([^"\')\s;]+)')
+CSS_URL = re.compile(r'url\(\s*["\']?([^"\')]+?)["\']?\s*\)')
+RC_COMMENT = re.compile(r'("[^"\n]*")|#[^\n]*')
+RC_INCLUDE = re.compile(r'^\s*include\s+"([^"]+)"', re.M)
+RC_PIXMAP_PATH = re.compile(r'^\s*pixmap_path\s+"([^"]+)"', re.M)
+RC_FILE = re.compile(r'\b(?:\w*file|bg_pixmap\s*\[\s*\w+\s*\])\s*=\s*"([^"]+)"')
+
+
+class DirIndex:
+    """One os.listdir() per real directory, shared by every lookup."""
+
+    def __init__(self):
+        self.listings = {}
+
+    def entries(self, directory):
+        real = os.path.realpath(directory)
+        if real not in self.listings:
+            try:
+                self.listings[real] = frozenset(os.listdir(real))
+            except OSError:
+                self.listings[real] = frozenset()
+        return self.listings[real]
+
+    def resolve(self, path):
+        """Real path of `path` if it exists, else None. Symlinked folders
+        are resolved once per directory, not once per reference."""
+        directory, name = os.path.split(os.path.normpath(path))
+        if name in self.entries(directory):
+            return os.path.join(os.path.realpath(directory), name)
+        return None
+
+
+def blank_comments(text, pattern):
+    """Replace comments by the same number of newlines to keep line numbers."""
+    return pattern.sub(lambda m: '\n' * m.group(0).count('\n'), text)
+
+
+def line_of(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+_parse_cache = {}
+
+
+def parse_file(path, kind):
+    """Return (includes, references, search dirs) of a CSS or gtkrc file.
+    References are (line, raw path) tuples."""
+    with open(path, 'rb') as f:
+        return parse_data(f.read(), kind)
+
+
+def parse_data(data, kind):
+    """Parsed once per distinct content, so the copied gtk-* dirs of the
+    generated themes cost a hash, not a parse."""
+    key = (kind, hashlib.sha1(data).hexdigest())
+    if key not in _parse_cache:
+        text = data.decode(errors='replace')
+        includes, refs, search = [], [], []
+        if kind == 'css':
+            text = blank_comments(text, CSS_COMMENT)
+            imports = set()
+            for m in CSS_IMPORT.finditer(text):
+                includes.append(m.group(1))
+                imports.add(m.start(1))
+            for m in CSS_URL.finditer(text):
+                if m.start(1) not in imports and not m.group(1).startswith('data:'):
+                    refs.append((line_of(text, m.start(1)), m.group(1)))
+        else:
+            text = RC_COMMENT.sub(lambda m: m.group(1) or '', text)
+            includes = RC_INCLUDE.findall(text)
+            for m in RC_PIXMAP_PATH.finditer(text):
+                search.extend(p for p in m.group(1).split(':') if p and p != '<parent>')
+            for m in RC_FILE.finditer(text):
+                refs.append((line_of(text, m.start(1)), m.group(1)))
+        _parse_cache[key] = (includes, refs, search)
+    return _parse_cache[key]
+
+
+def collect_references(theme_dir, index):
+    """Walk the files GTK actually loads for one theme.
+    Returns a list of (source file, line, raw ref, resolved real path or None)."""
+    found = []
+    entry_points = [(os.path.join(theme_dir, d, 'gtk.css'), 'css') for d in ('gtk-3.0', 'gtk-4.0')]
+    entry_points.append((os.path.join(theme_dir, 'gtk-2.0', 'gtkrc'), 'rc'))
+    seen = set()
+    todo = [p for p in entry_points if index.resolve(p[0])]
+    while todo:
+        path, kind = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        base = os.path.dirname(path)
+        includes, refs, search = parse_file(path, kind)
+        for inc in includes:
+            inc_path = os.path.join(base, inc)
+            if inc.startswith('resource://'):
+                found += collect_bundle_references(path, inc, index)
+            elif index.resolve(inc_path):
+                todo.append((inc_path, kind))
+            else:
+                found.append((path, 0, inc, None))
+        dirs = [base] + [os.path.join(base, s) for s in search]
+        for line, ref in refs:
+            target = None
+            for d in dirs:
+                target = index.resolve(os.path.join(d, ref))
+                if target:
+                    break
+            found.append((path, line, ref, target))
+    return found
+
+
+def collect_bundle_references(source, uri, index):
+    """Follow a resource:// import into the gtk.gresource next to gtk.css
+    (generate-all-themes.py --gresource). A bundled image counts as a use
+    of the theme file it was copied from."""
+    gtk_dir = os.path.dirname(source)
+    bundle = os.path.join(gtk_dir, 'gtk.gresource')
+    respath = uri[len('resource://'):]
+    reader = None
+    if index.resolve(bundle):
+        with open(bundle, 'rb') as f:
+            reader = gresource.GResourceReader(f.read())
+    data = reader.lookup(respath) if reader else None
+    if data is None:
+        return [(source, 0, uri, None)]
+    # resources are laid out as <prefix>/<gtk dir>/gtk.css, <prefix>/img/...
+    prefix = posixpath.dirname(posixpath.dirname(respath)) + '/'
+    theme_dir = os.path.dirname(gtk_dir)
+    bundled = set(reader.paths())
+    found = []
+    includes, refs, search = parse_data(data, 'css')
+    for line, ref in [(0, inc) for inc in includes] + refs:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(respath), ref))
+        if target not in bundled:
+            found.append((f"{bundle}:{respath}", line, ref, None))
+            continue
+        original = index.resolve(os.path.join(theme_dir, target[len(prefix):]))
+        found.append((f"{bundle}:{respath}", line, ref, original or bundle))
+    return found
+
+
+def list_assets(index):
+    """All image files under the base theme's asset folders, by real path."""
+    assets = []
+    for sd in ASSET_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(BASE_THEME, sd)):
+            dirnames.sort()
+            index.listings.setdefault(os.path.realpath(dirpath),
+                                      frozenset(dirnames + filenames))
+            for fn in sorted(filenames):
+                if fn.lower().endswith(IMAGE_EXTS):
+                    assets.append(os.path.realpath(os.path.join(dirpath, fn)))
+    return assets
+
+
+def find_duplicates(paths):
+    """Group byte-identical files: bucket by size first, hash only collisions."""
+    by_size = {}
+    for p in paths:
+        by_size.setdefault(os.path.getsize(p), []).append(p)
+    groups = {}
+    for same in by_size.values():
+        if len(same) < 2:
+            continue
+        for p in same:
+            with open(p, 'rb') as f:
+                groups.setdefault(hashlib.sha1(f.read()).hexdigest(), []).append(p)
+    return sorted(g for g in groups.values() if len(g) > 1)
+
+
+def rel(path):
+    return os.path.relpath(path, THEMES_DIR)
+
+
+def main():
+    quiet = '--quiet' in sys.argv
+    if not os.path.isdir(BASE_THEME):
+        print(f"ERROR: Base theme not found at {BASE_THEME}")
+        sys.exit(1)
+
+    themes = [BASE_THEME]
+    if '--base-only' not in sys.argv:
+        themes += [os.path.join(THEMES_DIR, d) for d in sorted(os.listdir(THEMES_DIR))
+                   if d.startswith('CDE-') and d != 'CDE-Theme']
+
+    index = DirIndex()
+    assets = list_assets(index)
+    used = set()
+    missing = []
+    total = 0
+    for theme in themes:
+        for source, line, ref, target in collect_references(theme, index):
+            total += 1
+            if target:
+                used.add(target)
+            else:
+                missing.append((source, line, ref))
+
+    unused = [a for a in assets if a not in used]
+    duplicates = find_duplicates(assets)
+
+    if not quiet:
+        for source, line, ref in missing:
+            print(f"  MISSING  {rel(source)}:{line}: {ref}")
+        for a in unused:
+            print(f"  UNUSED   {rel(a)}")
+        for group in duplicates:
+            print(f"  DUPLICATE {', '.join(rel(p) for p in group)}")
+        print()
+
+    print(f"Checked {total} references in {len(themes)} themes "
+          f"({len(index.listings)} directory listings)")
+    print(f"  missing: {len(missing)}  unused: {len(unused)} of {len(assets)} assets  "
+          f"duplicate groups: {len(duplicates)}")
+    sys.exit(1 if missing else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Byte-identical icon deduplication for the icon themes.
+Replaces every duplicate PNG/SVG/XPM of a theme by a link to one copy, so
+the tree copied into dom0 (and the page cache of every process loading
+icons from it) holds each image once.
+
+Files are bucketed by size first; only files sharing a size with another
+file are read, and those are hashed in a process pool. Within a group of
+identical files the first path in sorted order is kept, the others become
+relative symlinks to it (the form the theme already uses for its aliases,
+and the one git can store) or, with --hardlink, hardlinks, which also save
+the inodes but only survive on a single filesystem, e.g. ~/.icons in dom0.
+Paths that already share an inode count as one copy.
+
+Afterwards the icon-theme.cache of every deduplicated theme is updated
+(icon_cache.py), since replacing files touches the directory mtimes GTK
+compares with the cache.
+
+Usage:
+    python3 dedup-icons.py [theme dir ...]     # default: .icons/Chicago95-tux
+    python3 dedup-icons.py --dry-run           # only report what would be linked
+    python3 dedup-icons.py --hardlink ~/.icons/Chicago95-tux
+    python3 dedup-icons.py -j 4                # hashing processes (default: one per core)
+    python3 dedup-icons.py --quiet             # only print the summary
+"""
+
+import os
+import sys
+import stat
+import hashlib
+import multiprocessing
+
+import icon_cache
+
+IMAGE_EXTS = ('.png', '.svg', '.xpm')
+
+
+def list_images(theme_dirs):
+    """{(device, inode): (size, [paths])} of the regular image files under
+    `theme_dirs`. Symlinks are left alone: they already share their target."""
+    inodes = {}
+    for theme_dir in theme_dirs:
+        for dirpath, dirnames, filenames in os.walk(theme_dir):
+            dirnames.sort()
+            for fn in sorted(filenames):
+                if not fn.endswith(IMAGE_EXTS):
+                    continue
+                path = os.path.join(dirpath, fn)
+                st = os.lstat(path)
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                inodes.setdefault((st.st_dev, st.st_ino), (st.st_size, []))[1].append(path)
+    return inodes
+
+
+def hash_file(path):
+    with open(path, 'rb') as f:
+        return path, hashlib.sha1(f.read()).hexdigest()
+
+
+def find_duplicates(inodes, jobs):
+    """Groups of identical files as lists of [paths] per inode, the inode to
+    keep first. Only inodes whose size is shared with another one are hashed."""
+    by_size = {}
+    for key, (size, paths) in inodes.items():
+        by_size.setdefault(size, []).append(key)
+    candidates = [key for keys in by_size.values() if len(keys) > 1 for key in keys]
+    first_path = {inodes[key][1][0]: key for key in candidates}
+
+    by_hash = {}
+    if candidates:
+        with multiprocessing.Pool(min(jobs, len(candidates))) as pool:
+            for path, digest in pool.imap_unordered(hash_file, sorted(first_path), chunksize=64):
+                key = first_path[path]
+                by_hash.setdefault((inodes[key][0], digest), []).append(inodes[key][1])
+    return sorted(sorted(group) for group in by_hash.values() if len(group) > 1)
+
+
+def replace_with_link(path, target, hardlink):
+    """Swap `path` for a link to `target` in one rename, so a reader sees
+    either the old file or the link, never a missing icon."""
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.dedup")
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    if hardlink:
+        os.link(target, tmp)
+    else:
+        os.symlink(os.path.relpath(target, os.path.dirname(path)), tmp)
+    os.replace(tmp, path)
+
+
+def main():
+    args = sys.argv[1:]
+    quiet = '--quiet' in args
+    dry_run = '--dry-run' in args or '-n' in args
+    hardlink = '--hardlink' in args
+    jobs = os.cpu_count() or 1
+    if '-j' in args:
+        jobs = max(1, int(args[args.index('-j') + 1]))
+        del args[args.index('-j'):args.index('-j') + 2]
+    theme_dirs = [a for a in args if not a.startswith('-')] or [icon_cache.DEFAULT_THEME]
+    for theme_dir in theme_dirs:
+        if not os.path.isdir(theme_dir):
+            print(f"ERROR: {theme_dir} is not a directory")
+            sys.exit(1)
+
+    inodes = list_images(theme_dirs)
+    groups = find_duplicates(inodes, jobs)
+
+    linked = saved_bytes = 0
+    touched = set()
+    for group in groups:
+        keep = group[0][0]
+        size = os.lstat(keep).st_size
+        for paths in group[1:]:
+            for path in paths:
+                if not quiet:
+                    print(f"  {'WOULD ' if dry_run else ''}LINK  {path} -> {keep}")
+                if not dry_run:
+                    replace_with_link(path, keep, hardlink)
+                    touched.update(t for t in theme_dirs
+                                   if os.path.commonpath([t, path]) == os.path.normpath(t))
+                linked += 1
+            saved_bytes += size
+    saved_inodes = sum(len(group) - 1 for group in groups) if hardlink else 0
+
+    if not quiet and groups:
+        print()
+    print(f"Checked {sum(len(paths) for size, paths in inodes.values())} images "
+          f"({len(inodes)} inodes) in {len(theme_dirs)} themes")
+    print(f"  duplicate groups: {len(groups)}  {'to link' if dry_run else 'linked'}: {linked}  "
+          f"bytes saved: {saved_bytes}  inodes saved: {saved_inodes}")
+
+    for theme_dir in sorted(touched):
+        if os.path.isfile(os.path.join(theme_dir, icon_cache.CACHE_NAME)):
+            n_dirs, n_icons, rescanned = icon_cache.update_cache(theme_dir)
+            print(f"Updated {os.path.join(theme_dir, icon_cache.CACHE_NAME)} "
+                  f"({rescanned} directories rescanned)")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,33 @@ Uses symlinks for shared assets (xfwm4, img, img2) to save disk space.
 
 Run from the dom0-themes directory:
     python3 generate-all-themes.py
+    python3 generate-all-themes.py --gresource   # also bundle GTK3/GTK4 into gtk.gresource
+    python3 generate-all-themes.py --reproducible
+    python3 generate-all-themes.py --icons       # also tint the folder icons per palette
+    python3 generate-all-themes.py --backdrops   # also render the CDE backdrops per palette
+
+--reproducible (implied when SOURCE_DATE_EPOCH is set) gives every generated
+file and directory the SOURCE_DATE_EPOCH mtime and a mode that only depends
+on the source file, so identical inputs produce byte-identical trees.
+
+--icons writes an overlay icon theme .icons/Chicago95-tux-<PaletteName>
+next to each theme (icon_tint.py) and names it as the theme's IconTheme.
+
+--backdrops writes CDE-<PaletteName>/backdrops with the CDE backdrops in
+the palette's workspace colors (backdrop_tint.py). Each backdrop is parsed
+and compressed once, in parallel, before the first theme; every theme then
+only gets its own PLTE chunk.
 """
 
 import os
 import sys
 import re
 import shutil
+import hashlib
+
+import gresource
+import icon_tint
+import backdrop_tint
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 THEMES_DIR = os.path.join(SCRIPT_DIR, ".themes")
@@ -46,6 +67,13 @@ XmCOLOR_LITE_THRESHOLD = XmDEFAULT_LIGHT_THRESHOLD * XmCOLOR_PERCENTILE
 XmCOLOR_DARK_THRESHOLD = XmDEFAULT_DARK_THRESHOLD * XmCOLOR_PERCENTILE
 XmFOREGROUND_THRESHOLD = XmDEFAULT_FOREGROUND_THRESHOLD * XmCOLOR_PERCENTILE
 
+# Structural templates scanned for colorset references (never cdecolors.*)
+GTK3_TEMPLATES = ["gtk.css", "colors.css", "widgets.css"]
+GTK2_TEMPLATES = ["gtkrc"]
+CSS_COLOR_REF = re.compile(r'@(bg|fg|ts|bs|sel)_color_([1-8])\b')
+RC_STYLE_REF = re.compile(r'"cde_style_(sel_)?([1-8])"')
+COLOR_ROLES = ['bg', 'fg', 'ts', 'bs', 'sel']
+
 HEX = '0123456789abcdef'
 HEXNUM = [4096, 256, 16, 1]
 
@@ -161,26 +189,56 @@ def compute_colorset(palette_lines):
     return bg, fg, ts, bs, sel
 
 
-def gen_gtk3_css(bg, fg, ts, bs, sel, name):
+_usage_cache = {}
+
+
+def analyze_template_usage(template_dir, templates, pattern):
+    """Set of (role, slot) pairs used by the templates, cached by their hash.
+    None means no template was found and every slot should be emitted."""
+    h = hashlib.sha1()
+    texts = []
+    for name in templates:
+        path = os.path.join(template_dir, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            h.update(name.encode() + b'\0' + data + b'\0')
+            texts.append(data)
+    if not texts:
+        return None
+    key = (pattern.pattern, h.hexdigest())
+    if key not in _usage_cache:
+        used = set()
+        for data in texts:
+            for role, slot in pattern.findall(data.decode(errors='replace')):
+                used.add((role.rstrip('_') or 'style', int(slot)))
+        _usage_cache[key] = frozenset(used)
+    return _usage_cache[key]
+
+
+def gen_gtk3_css(bg, fg, ts, bs, sel, name, used=None):
+    colors = {'bg': bg, 'fg': fg, 'ts': ts, 'bs': bs, 'sel': sel}
     lines = [f"\n/*\n Generated by generate-all-themes.py for palette {name}\n*/\n"]
     for a in range(1, 9):
-        lines.append(f"@define-color bg_color_{a} {bg[a]}; ")
-        lines.append(f"@define-color fg_color_{a} {fg[a]}; ")
-        lines.append(f"@define-color ts_color_{a} {ts[a]}; ")
-        lines.append(f"@define-color bs_color_{a} {bs[a]}; ")
-        lines.append(f"@define-color sel_color_{a} {sel[a]}; ")
+        roles = [r for r in COLOR_ROLES if used is None or (r, a) in used]
+        if not roles:
+            continue
+        for r in roles:
+            lines.append(f"@define-color {r}_color_{a} {colors[r][a]}; ")
         lines.append("")
     lines.append('\n* {\n    font-family: "DejaVu Serif";\n    font-size: 12px;\n}\n')
     return "\n".join(lines)
 
 
-def gen_gtk2_rc(bg, fg, ts, bs, sel, name):
+def gen_gtk2_rc(bg, fg, ts, bs, sel, name, used=None):
     lines = [f"#\n# Generated by generate-all-themes.py for palette {name}\n#\n"]
     scheme = (f"fg_color:{fg[5]}\\nbg_color:{bg[5]}\\nbase_color:{bg[4]}\\n"
               f"text_color:{fg[5]}\\nselected_bg_color:{sel[5]}\\nselected_fg_color:{fg[5]}\\n"
               f"tooltip_bg_color:{sel[5]}\\ntooltip_fg_color:{fg[5]}")
     lines.append(f'gtk-color-scheme = "{scheme}"\n')
     for a in range(1, 9):
+        if used is not None and ('style', a) not in used:
+            continue
         lines.append(f'style "cde_style_{a}"\n{{')
         lines.append(f'    fg[NORMAL]  ="{fg[a]}"\n    bg[NORMAL]  ="{bg[a]}"')
         lines.append(f'    text[NORMAL]="{fg[a]}"\n    base[NORMAL]="{bg[a]}"')
@@ -194,6 +252,8 @@ def gen_gtk2_rc(bg, fg, ts, bs, sel, name):
         lines.append(f'    text[INSENSITIVE]="{bs[a]}"\n    base[INSENSITIVE]="{bg[a]}"')
         lines.append("}\n")
     for a in range(1, 9):
+        if used is not None and ('sel', a) not in used:
+            continue
         lines.append(f'style "cde_style_sel_{a}"\n{{')
         lines.append(f'    fg[NORMAL]  ="{fg[a]}"\n    bg[NORMAL]  ="{sel[a]}"')
         lines.append(f'    text[NORMAL]="{fg[a]}"\n    base[NORMAL]="{sel[a]}"')
@@ -209,7 +269,8 @@ def gen_gtk2_rc(bg, fg, ts, bs, sel, name):
     return "\n".join(lines)
 
 
-def gen_index_theme(name):
+def gen_index_theme(name, icon_theme=None):
+    icon_line = f"IconTheme={icon_theme}\n" if icon_theme else ""
     return f"""[Desktop Entry]
 Type=X-GNOME-Metatheme
 Name=CDE - {name}
@@ -218,7 +279,7 @@ Encoding=UTF-8
 
 [X-GNOME-Metatheme]
 GtkTheme=CDE - {name}
-ButtonLayout=close,minimize,maximize:menu
+{icon_line}ButtonLayout=close,minimize,maximize:menu
 
 [X-GNOME-Metatheme-GTK4]
 GtkTheme=CDE - {name}
@@ -226,6 +287,87 @@ ButtonLayout=close,minimize,maximize:menu
 """
 
 
+CSS_IMPORT = re.compile(r'@import\s+url\(\s*["\']?([^"\')]+)["\']?\s*\)\s*;')
+RESOURCE_PREFIX = "/org/cde/themes"
+BUNDLE_EXTS = ('.png', '.svg', '.xpm')
+_bundle_cache = {}
+
+
+def flatten_css(path):
+    """gtk.css with every relative @import inlined, in import order."""
+    with open(path) as f:
+        css = f.read()
+    base = os.path.dirname(path)
+
+    def inline(m):
+        target = os.path.join(base, m.group(1))
+        if '://' in m.group(1) or not os.path.isfile(target):
+            return m.group(0)
+        return flatten_css(target)
+    return CSS_IMPORT.sub(inline, css)
+
+
+def bundle_assets(top):
+    """(path relative to top, bytes) of every image under top. Read once per
+    real directory, since img/img2 are the same symlinked dirs in every theme."""
+    real_top = os.path.realpath(top)
+    if real_top not in _bundle_cache:
+        assets = []
+        for dirpath, dirnames, filenames in os.walk(real_top):
+            dirnames.sort()
+            for fn in sorted(filenames):
+                if fn.endswith(BUNDLE_EXTS):
+                    path = os.path.join(dirpath, fn)
+                    with open(path, 'rb') as f:
+                        assets.append((os.path.relpath(path, real_top), f.read()))
+        _bundle_cache[real_top] = assets
+    return _bundle_cache[real_top]
+
+
+def write_gtk_gresource(theme_dir, gtk_dir, theme_name):
+    """Bundle the flattened CSS of gtk_dir plus the img/img2 images into
+    gtk_dir/gtk.gresource and point gtk.css at it. GTK registers the
+    gtk.gresource next to a theme's gtk.css, so an app then maps one file
+    instead of opening every stylesheet and image."""
+    prefix = f"{RESOURCE_PREFIX}/{theme_name}"
+    sub = os.path.basename(gtk_dir)
+    files = {f"{prefix}/{sub}/gtk.css": flatten_css(os.path.join(gtk_dir, "gtk.css")).encode()}
+    for sd in [sub, 'img', 'img2']:
+        top = os.path.join(theme_dir, sd)
+        if os.path.isdir(top):
+            for rel, data in bundle_assets(top):
+                files[f"{prefix}/{sd}/{rel}"] = data
+    gresource.write_gresource(os.path.join(gtk_dir, "gtk.gresource"), files)
+    with open(os.path.join(gtk_dir, "gtk.css"), 'w') as f:
+        f.write(f"/* Generated by generate-all-themes.py, the stylesheet is in gtk.gresource */\n"
+                f'@import url("resource://{prefix}/{sub}/gtk.css");\n')
+    return len(files)
+
+
+# Fallback for --reproducible without SOURCE_DATE_EPOCH: 1980-01-01, the
+# earliest timestamp zip/tar based transfer tools all handle.
+DEFAULT_EPOCH = 315532800
+
+
+def normalize_tree(top, epoch):
+    """Fix the mtime and mode of everything under top (top included).
+    Files get 0755 if they had any execute bit and 0644 otherwise, so the
+    umask and copy order no longer show up in the result."""
+    for dirpath, dirnames, filenames in os.walk(top, topdown=False):
+        for name in sorted(dirnames + filenames):
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                os.utime(path, (epoch, epoch), follow_symlinks=False)
+                continue
+            if os.path.isdir(path):
+                os.chmod(path, 0o755)
+            else:
+                os.chmod(path, 0o755 if os.stat(path).st_mode & 0o111 else 0o644)
+            os.utime(path, (epoch, epoch))
+    os.chmod(top, 0o755)
+    os.utime(top, (epoch, epoch))
+
+
 def read_palette(filepath):
     with open(filepath, 'r') as f:
         return [l.strip() for l in f.readlines() if l.strip()][:8]
@@ -245,6 +387,12 @@ def main():
         print(f"ERROR: Palettes dir not found at {PALETTES_DIR}")
         sys.exit(1)
 
+    use_gresource = '--gresource' in sys.argv
+    use_icons = '--icons' in sys.argv
+    use_backdrops = '--backdrops' in sys.argv
+    epoch = None
+    if '--reproducible' in sys.argv or 'SOURCE_DATE_EPOCH' in os.environ:
+        epoch = int(os.environ.get('SOURCE_DATE_EPOCH', DEFAULT_EPOCH))
     palette_files = sorted([f for f in os.listdir(PALETTES_DIR) if f.endswith('.dp')])
     print(f"Generating {len(palette_files)} CDE themes...\n")
 
@@ -254,6 +402,9 @@ def main():
     # GTK files that need to be copied (not color files -- the structural CSS/rc)
     # We'll copy the whole gtk-2.0, gtk-3.0, gtk-4.0 dirs and then overwrite the color files
 
+    if use_backdrops:
+        backdrop_tint.encode_backdrops(backdrop_tint.list_backdrops().values())
+
     count = 0
     for pf in palette_files:
         name = pf[:-3]  # strip .dp
@@ -268,7 +419,8 @@ def main():
 
         # Write index.theme
         with open(os.path.join(theme_dir, "index.theme"), 'w') as f:
-            f.write(gen_index_theme(name))
+            icon_theme = os.path.basename(icon_tint.overlay_path(name)) if use_icons else None
+            f.write(gen_index_theme(name, icon_theme))
 
         # Symlink shared asset directories to the base theme
         for sd in shared_dirs:
@@ -290,7 +442,8 @@ def main():
         if os.path.isdir(gtk2_src):
             shutil.copytree(gtk2_src, gtk2_dst)
             with open(os.path.join(gtk2_dst, "cdecolors.rc"), 'w') as f:
-                f.write(gen_gtk2_rc(bg, fg, ts, bs, sel, name))
+                used = analyze_template_usage(gtk2_src, GTK2_TEMPLATES, RC_STYLE_REF)
+                f.write(gen_gtk2_rc(bg, fg, ts, bs, sel, name, used))
 
         # gtk-3.0: copy structure, write colors
         gtk3_src = os.path.join(BASE_THEME, "gtk-3.0")
@@ -298,7 +451,8 @@ def main():
         if os.path.isdir(gtk3_src):
             shutil.copytree(gtk3_src, gtk3_dst)
             with open(os.path.join(gtk3_dst, "cdecolors.css"), 'w') as f:
-                f.write(gen_gtk3_css(bg, fg, ts, bs, sel, name))
+                used = analyze_template_usage(gtk3_src, GTK3_TEMPLATES, CSS_COLOR_REF)
+                f.write(gen_gtk3_css(bg, fg, ts, bs, sel, name, used))
 
         # gtk-4.0: copy structure, write colors
         gtk4_src = os.path.join(BASE_THEME, "gtk-4.0")
@@ -306,7 +460,26 @@ def main():
         if os.path.isdir(gtk4_src):
             shutil.copytree(gtk4_src, gtk4_dst)
             with open(os.path.join(gtk4_dst, "cdecolors.css"), 'w') as f:
-                f.write(gen_gtk3_css(bg, fg, ts, bs, sel, name))
+                used = analyze_template_usage(gtk4_src, GTK3_TEMPLATES, CSS_COLOR_REF)
+                f.write(gen_gtk3_css(bg, fg, ts, bs, sel, name, used))
+
+        if use_gresource:
+            for gtk_dst in (gtk3_dst, gtk4_dst):
+                if os.path.isfile(os.path.join(gtk_dst, "gtk.css")):
+                    write_gtk_gresource(theme_dir, gtk_dst, theme_name)
+
+        if use_icons:
+            icon_dir = icon_tint.overlay_path(name)
+            icon_tint.tint_theme(icon_dir, name, bg)
+            if epoch is not None:
+                normalize_tree(icon_dir, epoch)
+
+        if use_backdrops:
+            backdrop_tint.render_backdrops(os.path.join(theme_dir, "backdrops"),
+                                           backdrop_tint.slot_colors((bg, fg, ts, bs, sel)))
+
+        if epoch is not None:
+            normalize_tree(theme_dir, epoch)
 
         count += 1
         # Print a sample color for visual reference
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Qubes Memory Monitor for XFCE Generic Monitor, in one process.
+Prints the same <txt>/<tool> markup as qubes-mem-genmon.sh, byte for byte,
+but reads the memory values of all domains in one batch instead of forking
+xl, xenstore-read, awk and sed for every value.
+
+Usage:
+    qubes-mem-genmon.py                          # genmon command
+    qubes-mem-genmon.py --backend commands       # force a backend: xs, commands or fake
+    qubes-mem-genmon.py --fake fake-xenstore.json
+    qubes-mem-genmon.py --serve [--interval 2] [--history 30] [--output FILE]
+
+Backends:
+    xs        the xen.lowlevel bindings of dom0's python3-xen: all values in
+              one xenstore transaction, the total memory from physinfo, no
+              process started at all
+    commands  one `xenstore-ls -f /local/domain` and one `xl info`
+    fake      a JSON file {"xenstore": {path: value}, "total_memory": MB},
+              to run off Qubes (default: fake-xenstore.json next to this
+              script, or $QUBES_GENMON_FAKE)
+The default is xs when the bindings import, else commands.
+
+--serve keeps running: it samples every --interval seconds (default 2)
+with one backend kept open, remembers the last --history samples (default
+30) of every qube in a ring buffer, and publishes the markup to --output
+(default $XDG_RUNTIME_DIR/qubes-mem-genmon.txt) with an atomic rename, only
+when it changed. The genmon command becomes `cat` of that file. The tooltip
+then also has a sparkline of each qube's actual memory (relative to its
+max) and the min/max of the total; the <txt> line stays the same.
+A sample that fails (xenstore, a bad value, a half-written --fake file) is
+logged to stderr and published as "? / ? / ? / ?" with the error in the
+tooltip; so is the end of the sampler. A failed write of --output (a full
+runtime dir) is logged too, and the sampler keeps going either way.
+--samples N stops after N samples, e.g. against the fake backend.
+"""
+
+import os
+import re
+import sys
+import time
+import signal
+from array import array
+from xml.sax.saxutils import escape
+
+FAKE_XENSTORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake-xenstore.json')
+MEMORY_KEYS = ('target', 'meminfo', 'static-max', 'hotplug-max')
+XENSTORE_PATH = re.compile(r'^/local/domain/(\d+)/(name|memory/([a-z-]+))$')
+XENSTORE_VALUE = re.compile(r'^/local/domain/(\d+)/(name|memory/[a-z-]+) = "(.*)"$')
+SEPARATOR = '─' * 48
+ROW = '%-20s %5s  %5s  %5s'
+SPARKS = '▁▂▃▄▅▆▇█'
+RUNTIME_DIR = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+DEFAULT_OUTPUT = os.path.join(RUNTIME_DIR, 'qubes-mem-genmon.txt')
+
+
+def domains_from_paths(values):
+    """[(domid, name, {memory key: value})] of flat {xenstore path: value},
+    in domid order like `xl list`."""
+    domains = {}
+    for path, value in values.items():
+        m = XENSTORE_PATH.match(path)
+        if not m:
+            continue
+        domain = domains.setdefault(int(m.group(1)), [None, {}])
+        if m.group(2) == 'name':
+            domain[0] = value
+        elif m.group(3) in MEMORY_KEYS:
+            domain[1][m.group(3)] = value
+    return [(domid, name, memory) for domid, (name, memory) in sorted(domains.items()) if name]
+
+
+class XsBackend:
+    """xenstore and physinfo through the xen.lowlevel bindings."""
+
+    def __init__(self):
+        from xen.lowlevel import xc, xs
+        self.xs = xs.xs()
+        self.xc = xc.xc()
+
+    def read(self):
+        t = self.xs.transaction_start()
+        try:
+            domains = []
+            for domid in sorted(int(d) for d in self.xs.ls(t, '/local/domain') or []):
+                base = f'/local/domain/{domid}'
+                name = self.xs.read(t, f'{base}/name')
+                if not name:
+                    continue
+                memory = {}
+                for key in MEMORY_KEYS:
+                    value = self.xs.read(t, f'{base}/memory/{key}')
+                    if value is not None:
+                        memory[key] = value.decode()
+                domains.append((domid, name.decode(), memory))
+        finally:
+            self.xs.transaction_end(t, True)
+        # xl info: total_pages in MB; physinfo gives them in KiB
+        return domains, self.xc.physinfo()['total_memory'] // 1024
+
+
+class CommandBackend:
+    """xenstore-ls and xl info, two processes per read."""
+
+    def read(self):
+        import subprocess
+        values = {}
+        try:
+            listing = subprocess.run(['xenstore-ls', '-f', '/local/domain'], capture_output=True,
+                                     text=True).stdout
+        except OSError:
+            listing = ''
+        for line in listing.splitlines():
+            m = XENSTORE_VALUE.match(line)
+            if m:
+                values[f'/local/domain/{m.group(1)}/{m.group(2)}'] = m.group(3)
+        total_mb = None
+        try:
+            info = subprocess.run(['xl', 'info'], capture_output=True, text=True).stdout
+        except OSError:
+            info = ''
+        for line in info.splitlines():
+            if 'total_memory' in line and len(line.split()) > 2:
+                total_mb = line.split()[2]
+                break
+        return domains_from_paths(values), total_mb
+
+
+class FakeBackend:
+    """A fake xenstore in a JSON file, for running off Qubes."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self):
+        import json
+        with open(self.path) as f:
+            fake = json.load(f)
+        return domains_from_paths(fake.get('xenstore', {})), fake.get('total_memory')
+
+
+def get_backend(name=None, fake=None):
+    if fake or name == 'fake':
+        return FakeBackend(fake or os.environ.get('QUBES_GENMON_FAKE', FAKE_XENSTORE))
+    if name == 'commands':
+        return CommandBackend()
+    try:
+        return XsBackend()
+    except Exception:
+        if name == 'xs':
+            raise
+        return CommandBackend()
+
+
+def gb(value):
+    """%.1f without the leading 0 of values below 1, like the awk | sed of the shell script."""
+    text = '%.1f' % value
+    return text[1:] if text.startswith('0.') else text
+
+
+def kb_to_gb(kb):
+    return '.0' if not kb or kb == '0' else gb(int(kb) / 1048576)
+
+
+def mb_to_gb(mb):
+    return '.0' if not mb or str(mb) == '0' else gb(int(mb) / 1024)
+
+
+class RingBuffer:
+    """The last `size` (act, tgt, max) samples in KiB of one qube, in one
+    flat array that is written in place."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = array('Q', bytes(8 * 3 * size))
+        self.count = 0
+
+    def append(self, act, tgt, max_kb):
+        i = self.count % self.size * 3
+        self.values[i:i + 3] = array('Q', (act, tgt, max_kb))
+        self.count += 1
+
+    def series(self, field=0):
+        """Samples of one field (0 act, 1 tgt, 2 max), oldest first."""
+        n = min(self.count, self.size)
+        start = (self.count - n) % self.size
+        return [self.values[(start + i) % self.size * 3 + field] for i in range(n)]
+
+
+def sparkline(samples, top):
+    """One block character per sample, scaled to `top`."""
+    top = top or max(samples, default=0) or 1
+    return ''.join(SPARKS[min(len(SPARKS) - 1, v * len(SPARKS) // (top + 1))] for v in samples)
+
+
+def domain_values(memory):
+    """(act, tgt, max) strings of one domain, with the fallbacks of the shell script."""
+    tgt_kb = memory.get('target') or '0'
+    act_kb = memory.get('meminfo') or tgt_kb
+    max_kb = memory.get('hotplug-max') or memory.get('static-max') or '0'
+    return act_kb, tgt_kb, max_kb
+
+
+def render(domains, total_mb, history=None):
+    """The genmon markup of qubes-mem-genmon.sh for [(domid, name, memory)];
+    with `history` ({name: RingBuffer}, with the TOTAL under None) the
+    tooltip rows get a sparkline of the actual memory."""
+    total_act = total_tgt = total_max = 0
+    rows = []
+    for domid, name, memory in domains:
+        if domid == 0:
+            name = 'dom0'
+        act_kb, tgt_kb, max_kb = domain_values(memory)
+        total_act += int(act_kb)
+        total_tgt += int(tgt_kb)
+        total_max += int(max_kb)
+        row = ROW % (name, kb_to_gb(act_kb), kb_to_gb(tgt_kb), kb_to_gb(max_kb))
+        if history is not None and name in history:
+            row += '  ' + sparkline(history[name].series(), int(max_kb))
+        rows.append(row + '\n')
+    system_total_gb = mb_to_gb(total_mb)
+    totals = [kb_to_gb(str(total)) for total in (total_act, total_tgt, total_max)]
+
+    total_row = ROW % ('TOTAL', *totals)
+    if history is not None and None in history:
+        act = history[None].series()
+        total_row += f"  {kb_to_gb(str(min(act)))}-{kb_to_gb(str(max(act)))}"
+    tooltip = ("<span font_desc='monospace'>" + ROW % ('domain', 'act', 'tgt', 'max') + '\n'
+               + SEPARATOR + '\n' + ''.join(rows)
+               + SEPARATOR + '\n' + total_row + '\n'
+               + '%-20s %5s' % ('System Total', system_total_gb) + '</span>')
+    return (f"<txt> {totals[0]} / {totals[1]} / {totals[2]} / {system_total_gb} </txt>\n"
+            f"<tool>{tooltip}</tool>\n")
+
+
+def publish(path, text):
+    """Replace `path` with `text` in one rename, so `cat` never sees half a file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def error_markup(message, last_good=None):
+    """The markup published after a failed sample: question marks instead
+    of the numbers, so the panel never shows old values as current."""
+    tool = escape(message)
+    if last_good is not None:
+        tool += '\nlast good sample at ' + time.strftime('%H:%M:%S', time.localtime(last_good))
+    return f"<txt> ? / ? / ? / ? </txt>\n<tool>{tool}</tool>\n"
+
+
+def sample(backend, history, size):
+    """Read `backend` once, add the sample to `history` and return the markup."""
+    domains, total_mb = backend.read()
+    values = [('dom0' if domid == 0 else name, [int(v) for v in domain_values(memory)])
+              for domid, name, memory in domains]
+    for name, (act_kb, tgt_kb, max_kb) in values:
+        history.setdefault(name, RingBuffer(size)).append(act_kb, tgt_kb, max_kb)
+    history.setdefault(None, RingBuffer(size)).append(sum(v[1][0] for v in values), 0, 0)
+    for name in set(history) - {None} - {name for name, v in values}:
+        del history[name]
+    return render(domains, total_mb, history)
+
+
+def serve(backend, output, interval, size, samples=None):
+    """Sample `backend` every `interval` seconds and publish the markup to
+    `output`. A failed sample is logged to stderr and published as an
+    error, and so is the end of the sampler, so `cat` shows no dead numbers."""
+    history = {}
+    published = None
+    last_error = publish_error = None
+    last_good = None
+    tick = time.monotonic()
+    count = 0
+    try:
+        while samples is None or count < samples:
+            try:
+                text = sample(backend, history, size)
+                last_good = time.time()
+                last_error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if error != last_error:
+                    print(f"qubes-mem-genmon: sample failed: {error}", file=sys.stderr)
+                last_error = error
+                text = error_markup(f"qubes-mem-genmon: {error}", last_good)
+            if text != published:
+                try:
+                    publish(output, text)
+                    published = text
+                    publish_error = None
+                except OSError as e:
+                    if str(e) != publish_error:
+                        print(f"qubes-mem-genmon: cannot publish {output}: {e}", file=sys.stderr)
+                    publish_error = str(e)
+            count += 1
+            tick += interval
+            if samples is None or count < samples:
+                time.sleep(max(0.0, tick - time.monotonic()))
+    finally:
+        try:
+            publish(output, error_markup("qubes-mem-genmon.py --serve is not running", last_good))
+        except OSError:
+            pass
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--backend': None, '--fake': None, '--interval': '2', '--history': '30',
+               '--output': DEFAULT_OUTPUT, '--samples': None}
+    for key in options:
+        if key in args:
+            options[key] = args[args.index(key) + 1]
+    backend = get_backend(options['--backend'], options['--fake'])
+    if '--serve' not in args:
+        sys.stdout.write(render(*backend.read()))
+        return
+    # a SIGTERM from the session ends the sampler like ctrl-c, marking the output stale
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(backend, options['--output'], float(options['--interval']), int(options['--history']),
+              int(options['--samples']) if options['--samples'] else None)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Pure-Python GResource (GVDB) writer and reader.
+Lets generate-all-themes.py bundle a theme's CSS and images into the
+gtk.gresource file GTK3/GTK4 load from a theme's gtk-3.0/gtk-4.0 folder,
+without needing glib-compile-resources in dom0.
+
+Usage:
+    python3 gresource.py <file.gresource>   # list the resources in a bundle
+    python3 gresource.py --self-test        # write a bundle and read it back
+
+The layout follows glib's gvdb-builder: a 24 byte header pointing at one
+hash table whose items are the full resource paths. Directories are 'L'
+items listing their children, files are 'v' items holding a (uuay)
+variant of (size, flags, data + NUL). All integers are little endian.
+"""
+
+import sys
+import struct
+
+GVDB_SIGNATURE = b'GVariant'
+HEADER = struct.Struct('<8sII II')       # signature, version, options, root start/end
+HASH_HEADER = struct.Struct('<II')       # n_bloom_words, n_buckets
+HASH_ITEM = struct.Struct('<IIIHcxII')   # hash, parent, key_start, key_size, type, value start/end
+NO_PARENT = 0xffffffff
+
+
+def djb_hash(key, h=5381):
+    """gvdb's key hash: djb2 over *signed* chars. Pass the hash of a prefix
+    as `h` to continue hashing from there."""
+    for b in key:
+        h = (h * 33 + (b - 256 if b > 127 else b)) & 0xffffffff
+    return h
+
+
+def serialize_resource(data):
+    """A file value: variant 'v' wrapping (uuay) = (size, flags, data + NUL).
+    The extra NUL is what glib-compile-resources appends to uncompressed data."""
+    return struct.pack('<II', len(data), 0) + data + b'\0' + b'\0' + b'(uuay)'
+
+
+class _Writer:
+
+    def __init__(self):
+        self.out = bytearray(HEADER.size)
+
+    def allocate(self, data, alignment):
+        while len(self.out) % alignment:
+            self.out.append(0)
+        start = len(self.out)
+        self.out += data
+        return start, len(self.out)
+
+
+def build_gresource(files):
+    """Return the bytes of a .gresource holding `files`, a dict of
+    absolute resource path ('/org/.../gtk.css') -> bytes."""
+    # Every file plus all of its parent directories, '/' included
+    children = {}
+    for path in files:
+        if not path.startswith('/') or path.endswith('/'):
+            raise ValueError(f"bad resource path: {path!r}")
+        child = path
+        while child != '/':
+            parent = child[:child.rstrip('/').rfind('/') + 1]
+            children.setdefault(parent, set()).add(child)
+            child = parent
+    keys = sorted(set(files) | set(children))
+
+    def parent_of(key):
+        return key[:key.rstrip('/').rfind('/') + 1] if key != '/' else None
+
+    # keys are sorted, so a parent directory is always hashed before its children
+    hashes = {}
+    for key in keys:
+        parent = parent_of(key)
+        if parent is None:
+            hashes[key] = djb_hash(key.encode())
+        else:
+            hashes[key] = djb_hash(key[len(parent):].encode(), hashes[parent])
+
+    n_buckets = max(1, len(keys))
+    buckets = [[] for _ in range(n_buckets)]
+    for key in keys:
+        buckets[hashes[key] % n_buckets].append(key)
+    order = [key for bucket in buckets for key in bucket]
+    index = {key: i for i, key in enumerate(order)}
+    starts, pos = [], 0
+    for bucket in buckets:
+        starts.append(pos)
+        pos += len(bucket)
+
+    w = _Writer()
+    table_size = HASH_HEADER.size + 4 * n_buckets + HASH_ITEM.size * len(order)
+    table_start, table_end = w.allocate(bytes(table_size), 4)
+    items = []
+    for key in order:
+        parent = parent_of(key)
+        name = key[len(parent):] if parent else key
+        key_start, key_end = w.allocate(name.encode(), 1)
+        if key in children:
+            kids = sorted(index[c] for c in children[key])
+            value = w.allocate(struct.pack(f'<{len(kids)}I', *kids), 4)
+            kind = b'L'
+        else:
+            value = w.allocate(serialize_resource(files[key]), 8)
+            kind = b'v'
+        items.append(HASH_ITEM.pack(hashes[key],
+                                    index[parent] if parent else NO_PARENT,
+                                    key_start, key_end - key_start, kind, *value))
+
+    table = (HASH_HEADER.pack(0, n_buckets) + struct.pack(f'<{n_buckets}I', *starts)
+             + b''.join(items))
+    w.out[table_start:table_end] = table
+    w.out[:HEADER.size] = HEADER.pack(GVDB_SIGNATURE, 0, 0, table_start, table_end)
+    return bytes(w.out)
+
+
+def write_gresource(path, files):
+    with open(path, 'wb') as f:
+        f.write(build_gresource(files))
+
+
+class GResourceReader:
+    """Reads a .gresource the way glib's gvdb does, lookups included."""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        signature, version, options, start, end = HEADER.unpack_from(self.data, 0)
+        if signature != GVDB_SIGNATURE or version != 0:
+            raise ValueError("not a little endian GVDB file")
+        n_bloom_words, self.n_buckets = HASH_HEADER.unpack_from(self.data, start)
+        n_bloom_words &= (1 << 27) - 1
+        pos = start + HASH_HEADER.size + 4 * n_bloom_words
+        self.buckets = struct.unpack_from(f'<{self.n_buckets}I', self.data, pos)
+        pos += 4 * self.n_buckets
+        self.items = [HASH_ITEM.unpack_from(self.data, p)
+                      for p in range(pos, end - HASH_ITEM.size + 1, HASH_ITEM.size)]
+
+    def _key(self, i):
+        h, parent, key_start, key_size, kind, vstart, vend = self.items[i]
+        name = bytes(self.data[key_start:key_start + key_size])
+        return (self._key(parent) if parent != NO_PARENT else b'') + name
+
+    def _find(self, path, kind):
+        key = path.encode()
+        if not self.n_buckets or not self.items:
+            return None
+        h = djb_hash(key)
+        bucket = h % self.n_buckets
+        itemno = self.buckets[bucket]
+        lastno = len(self.items)
+        if bucket != self.n_buckets - 1 and self.buckets[bucket + 1] <= lastno:
+            lastno = self.buckets[bucket + 1]
+        for i in range(itemno, lastno):
+            item = self.items[i]
+            if item[0] == h and item[4] == kind and self._key(i) == key:
+                return item
+        return None
+
+    def lookup(self, path):
+        """The bytes of resource `path`, or None."""
+        item = self._find(path, b'v')
+        if item is None:
+            return None
+        vstart, vend = item[5], item[6]
+        if vstart % 8:
+            raise ValueError(f"{path}: value is not 8 byte aligned")
+        value = self.data[vstart:vend]
+        sep = bytes(value).rindex(b'\0')
+        if bytes(value[sep + 1:]) != b'(uuay)':
+            raise ValueError(f"{path}: unexpected value type")
+        size, flags = struct.unpack_from('<II', value, 0)
+        if flags:
+            raise ValueError(f"{path}: compressed resources are not supported")
+        return bytes(value[8:8 + size])
+
+    def children(self, path):
+        """Names listed under directory `path` (which ends with '/')."""
+        item = self._find(path, b'L')
+        if item is None:
+            return None
+        kids = struct.unpack_from(f'<{(item[6] - item[5]) // 4}I', self.data, item[5])
+        return sorted(self._key(k)[len(path):].decode() for k in kids)
+
+    def paths(self):
+        return sorted(self._key(i).decode() for i, item in enumerate(self.items)
+                      if item[4] == b'v')
+
+
+def self_test():
+    files = {
+        '/org/cde/themes/Test/gtk-3.0/gtk.css': b'@define-color bg_color_5 #78a0d5;\n',
+        '/org/cde/themes/Test/img/arrowdown.png': bytes(range(256)) * 3,
+        '/org/cde/themes/Test/img2/colorset4/button.png': b'',
+        '/org/cde/themes/Test/img2/colorset5/caf\u00e9.png': b'x',
+    }
+    reader = GResourceReader(build_gresource(files))
+    for path, data in files.items():
+        assert reader.lookup(path) == data, path
+    assert reader.paths() == sorted(files)
+    assert reader.lookup('/org/cde/themes/Test/missing.css') is None
+    assert reader.children('/') == ['org/']
+    assert reader.children('/org/cde/themes/Test/') == ['gtk-3.0/', 'img/', 'img2/']
+    print(f"ok: {len(files)} resources round-tripped")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+    if sys.argv[1] == '--self-test':
+        self_test()
+        return
+    with open(sys.argv[1], 'rb') as f:
+        reader = GResourceReader(f.read())
+    for path in reader.paths():
+        print(f"  {len(reader.lookup(path)):>8}  {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Pure-Python GTK icon-theme.cache writer, reader and verifier.
+Keeps .icons/Chicago95-tux/icon-theme.cache in step with the icons after
+they are added or recolored, without gtk-update-icon-cache.
+
+Usage:
+    python3 icon_cache.py [theme dir]            # update the cache, rescanning changed dirs only
+    python3 icon_cache.py --full [theme dir]     # rescan every directory
+    python3 icon_cache.py --verify [theme dir]   # compare the cache with the tree
+
+The theme dir defaults to .icons/Chicago95-tux. --verify exits with 1 when
+the cache is missing icons, lists deleted ones or is older than a directory.
+
+The format is gtk's (gtk/updateiconcache.c, version 1.0), big endian:
+a header pointing at a hash table of icon names and at the directory list.
+Every icon has a list of (directory index, suffix flags, image data) and
+image data is only written for .icon files: their attach points, embedded
+text rectangle and display names.
+
+An update reuses the entries of the previous cache for every directory
+whose mtime is not newer than the cache and only lists the directories that
+changed. gtk itself only compares the cache with the mtime of the theme
+directory, so it trusts a cache that misses a changed subdirectory; --verify
+checks every directory.
+"""
+
+import os
+import sys
+import mmap
+import struct
+import functools
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_THEME = os.path.join(SCRIPT_DIR, ".icons", "Chicago95-tux")
+CACHE_NAME = 'icon-theme.cache'
+
+MAJOR_VERSION, MINOR_VERSION = 1, 0
+HEADER = struct.Struct('>HHII')        # major, minor, hash offset, directory list offset
+ICON = struct.Struct('>III')           # chain offset, name offset, image list offset
+IMAGE = struct.Struct('>HHI')          # directory index, flags, image data offset
+IMAGE_DATA = struct.Struct('>II')      # pixel data offset, meta data offset
+META_DATA = struct.Struct('>III')      # embedded rect, attach point list, display name list
+NONE = 0xffffffff
+
+HAS_SUFFIX_XPM = 1
+HAS_SUFFIX_SVG = 2
+HAS_SUFFIX_PNG = 4
+HAS_ICON_FILE = 8
+SUFFIXES = {b'.png': HAS_SUFFIX_PNG, b'.svg': HAS_SUFFIX_SVG, b'.xpm': HAS_SUFFIX_XPM, b'.icon': HAS_ICON_FILE}
+
+# glib's g_spaced_primes_closest() table, which gtk sizes the hash table with
+SPACED_PRIMES = [11, 19, 37, 73, 109, 163, 251, 367, 557, 823, 1237, 1861, 2777, 4177,
+                 6247, 9371, 14057, 21089, 31627, 47431, 71143, 106721, 160073, 240101,
+                 360163, 540217, 810343, 1215497, 1823231, 2734867, 4102283, 6153409,
+                 9230113, 13845163]
+
+
+def icon_name_hash(name):
+    """gtk's icon name hash: h = h * 31 + c over *signed* chars."""
+    h = 0
+    for i, b in enumerate(name):
+        c = b - 256 if b > 127 else b
+        h = (c if i == 0 else (h << 5) - h + c) & 0xffffffff
+    return h
+
+
+def spaced_primes_closest(n):
+    for prime in SPACED_PRIMES:
+        if prime > n:
+            return prime
+    return SPACED_PRIMES[-1]
+
+
+def split_icon_file(file_name):
+    """(icon name, suffix flag) of an icon file name (bytes), or None.
+    Suffixes are matched case sensitively, like gtk does."""
+    stem, dot, ext = file_name.rpartition(b'.')
+    flag = SUFFIXES.get(b'.' + ext) if dot else None
+    return (stem, flag) if flag else None
+
+
+def parse_icon_file(path):
+    """Meta data of a .icon key file, as gtk-update-icon-cache reads it:
+    {'rect': (x0, y0, x1, y1) or None, 'attach': [(x, y)], 'names': [(lang, name)]}"""
+    meta = {'rect': None, 'attach': [], 'names': []}
+    try:
+        with open(path, 'rb') as f:
+            lines = f.read().decode('utf-8', 'replace').splitlines()
+    except OSError:
+        return meta
+    group = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            group = line[1:-1]
+            continue
+        if group != 'Icon Data' or '=' not in line:
+            continue
+        key, value = (s.strip() for s in line.split('=', 1))
+        try:
+            if key == 'EmbeddedTextRectangle':
+                rect = tuple(int(v) for v in value.split(','))
+                meta['rect'] = rect if len(rect) == 4 else None
+            elif key == 'AttachPoints':
+                meta['attach'] = [tuple(int(v) for v in p.split(',')) for p in value.split('|') if p]
+            elif key.startswith('DisplayName'):
+                lang = key[key.index('[') + 1:key.index(']')] if '[' in key else 'C'
+                meta['names'].append((lang, value))
+        except ValueError:
+            continue
+    return meta
+
+
+# --- reading -----------------------------------------------------------------
+
+class IconCache:
+    """An icon-theme.cache read back into {directory: {icon name: (flags, meta)}}.
+    Names are bytes, like the file names they come from. `data` may be an mmap:
+    lookup() only reads one hash chain, `dirs` is built on first use."""
+
+    def __init__(self, data):
+        self.data = data
+        major, minor, hash_offset, dir_offset = HEADER.unpack_from(data, 0)
+        if major != MAJOR_VERSION:
+            raise ValueError(f"unsupported icon cache version {major}.{minor}")
+        n_dirs = struct.unpack_from('>I', data, dir_offset)[0]
+        self.directories = [self._string(o) for o in
+                            struct.unpack_from(f'>{n_dirs}I', data, dir_offset + 4)]
+        self.n_buckets = struct.unpack_from('>I', data, hash_offset)[0]
+        self.buckets = struct.unpack_from(f'>{self.n_buckets}I', data, hash_offset + 4)
+        self._meta = {}
+
+    @functools.cached_property
+    def dirs(self):
+        data = self.data
+        dirs = {d: {} for d in self.directories}
+        for offset in self.buckets:
+            while offset != NONE:
+                chain, name_offset, images_offset = ICON.unpack_from(data, offset)
+                name = self._string(name_offset)
+                n_images = struct.unpack_from('>I', data, images_offset)[0]
+                for i in range(n_images):
+                    dir_index, flags, image_data = IMAGE.unpack_from(data, images_offset + 4 + i * IMAGE.size)
+                    meta = self._image_meta(image_data) if image_data else None
+                    dirs[self.directories[dir_index]][name] = (flags, meta)
+                offset = chain
+        return dirs
+
+    def _string(self, offset):
+        return self.data[offset:self.data.find(b'\0', offset)]
+
+    def _image_meta(self, offset):
+        if offset not in self._meta:
+            pixels, meta_offset = IMAGE_DATA.unpack_from(self.data, offset)
+            meta = {'rect': None, 'attach': [], 'names': []}
+            if meta_offset:
+                rect, attach, names = META_DATA.unpack_from(self.data, meta_offset)
+                if rect:
+                    meta['rect'] = struct.unpack_from('>4H', self.data, rect)
+                if attach:
+                    n = struct.unpack_from('>I', self.data, attach)[0]
+                    meta['attach'] = [struct.unpack_from('>HH', self.data, attach + 4 + 4 * i)
+                                      for i in range(n)]
+                if names:
+                    n = struct.unpack_from('>I', self.data, names)[0]
+                    for i in range(n):
+                        lang, name = struct.unpack_from('>II', self.data, names + 4 + 8 * i)
+                        meta['names'].append((self._string(lang).decode(), self._string(name).decode()))
+            self._meta[offset] = meta
+        return self._meta[offset]
+
+    def lookup(self, name):
+        """[(directory, flags)] of icon `name` (bytes), walking the hash chain like gtk."""
+        offset = self.buckets[icon_name_hash(name) % self.n_buckets]
+        while offset != NONE:
+            chain, name_offset, images_offset = ICON.unpack_from(self.data, offset)
+            if self._string(name_offset) == name:
+                n_images = struct.unpack_from('>I', self.data, images_offset)[0]
+                return [(self.directories[d], flags) for d, flags, image_data in
+                        (IMAGE.unpack_from(self.data, images_offset + 4 + i * IMAGE.size)
+                         for i in range(n_images))]
+            offset = chain
+        return []
+
+
+def read_cache(theme_dir):
+    """IconCache of `theme_dir`, or None when there is none or it is unreadable."""
+    try:
+        with open(os.path.join(theme_dir, CACHE_NAME), 'rb') as f:
+            return IconCache(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def map_cache(theme_dir):
+    """IconCache of `theme_dir` over a read-only mmap of the file, or None."""
+    try:
+        with open(os.path.join(theme_dir, CACHE_NAME), 'rb') as f:
+            return IconCache(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+# --- scanning ----------------------------------------------------------------
+
+def scan_directory(path):
+    """{icon name: (flags, meta)} of the icon files directly in `path` (None
+    when it has none), and its subdirectories. A regular file with an image
+    suffix is taken from the readdir type without a stat(); only symlinks are
+    followed, and dangling ones are left out like gtk-update-icon-cache does,
+    so gtk falls back to another directory instead of a missing file."""
+    icons = None
+    subdirs = []
+    with os.scandir(os.fsencode(path)) as it:
+        for entry in it:
+            split = split_icon_file(entry.name)
+            if split is None:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                continue
+            if not entry.is_file():
+                continue
+            name, flag = split
+            if icons is None:
+                icons = {}
+            flags, meta = icons.get(name, (0, None))
+            if flag == HAS_ICON_FILE:
+                meta = parse_icon_file(entry.path)
+            icons[name] = (flags | flag, meta)
+    # like gtk, a .icon file only annotates an image, it is no icon on its own,
+    # but it still puts its directory in the directory list
+    if icons is not None:
+        icons = {name: entry for name, entry in icons.items() if entry[0] != HAS_ICON_FILE}
+    return icons, subdirs
+
+
+def scan_theme(theme_dir, previous=None, since=None):
+    """{relative directory: {icon name: (flags, meta)}} for every directory of the
+    theme holding icon files. With a previous IconCache, a directory whose mtime is
+    not newer than `since` keeps its previous entries; it is still listed for
+    subdirectories, but its files are not looked at. Returns (dirs, rescanned)."""
+    dirs = {}
+    rescanned = 0
+    seen = set()
+    todo = [b'']
+    while todo:
+        rel = todo.pop()
+        path = os.path.join(os.fsencode(theme_dir), rel) if rel else os.fsencode(theme_dir)
+        real = os.path.realpath(path)
+        if real in seen:            # symlinked directory loops
+            continue
+        seen.add(real)
+        if previous is not None and rel and rel in previous.dirs and os.stat(path).st_mtime <= since:
+            icons = previous.dirs[rel]
+            with os.scandir(path) as it:
+                subdirs = [e.name for e in it if split_icon_file(e.name) is None and e.is_dir()]
+        else:
+            icons, subdirs = scan_directory(path)
+            rescanned += 1
+        if icons is not None and rel:
+            dirs[rel] = icons
+        todo.extend(os.path.join(rel, d) if rel else d for d in sorted(subdirs, reverse=True))
+    return dirs, rescanned
+
+
+# --- writing -----------------------------------------------------------------
+
+class _Writer:
+
+    def __init__(self):
+        self.out = bytearray()
+
+    def append(self, data):
+        start = len(self.out)
+        self.out += data
+        return start
+
+    def string(self, s):
+        start = self.append(s + b'\0')
+        while len(self.out) % 4:
+            self.out.append(0)
+        return start
+
+
+def _meta_key(meta):
+    return (meta['rect'], tuple(meta['attach']), tuple(meta['names']))
+
+
+def build_cache(dirs):
+    """Bytes of an icon-theme.cache for {directory: {icon name: (flags, meta)}}.
+    Laid out like gtk-update-icon-cache: hash table, then per bucket each icon
+    with its name, image list and image data, then the directory list. Names,
+    chains and directories are sorted, so equal trees give equal caches."""
+    directories = sorted(dirs)
+    dir_index = {d: i for i, d in enumerate(directories)}
+    icons = {}
+    for d in directories:
+        for name, (flags, meta) in dirs[d].items():
+            icons.setdefault(name, []).append((dir_index[d], flags, meta))
+
+    n_buckets = spaced_primes_closest(len(icons) // 3)
+    buckets = [[] for _ in range(n_buckets)]
+    for name in sorted(icons):
+        buckets[icon_name_hash(name) % n_buckets].append(name)
+
+    w = _Writer()
+    w.append(bytes(HEADER.size))
+    hash_offset = w.append(bytes(4 + 4 * n_buckets))
+    bucket_offsets = [NONE] * n_buckets
+    metas = {}
+    for b, chain in enumerate(buckets):
+        previous = None
+        for name in chain:
+            node = w.append(bytes(ICON.size))
+            name_offset = w.string(name)
+            images = sorted(icons[name])
+            images_offset = w.append(struct.pack('>I', len(images)) + bytes(IMAGE.size * len(images)))
+            for i, (d, flags, meta) in enumerate(images):
+                image_data = 0
+                if meta is not None:
+                    key = _meta_key(meta)
+                    if key not in metas:
+                        metas[key] = _write_meta(w, meta)
+                    image_data = w.append(IMAGE_DATA.pack(0, metas[key]))
+                w.out[images_offset + 4 + i * IMAGE.size:images_offset + 4 + (i + 1) * IMAGE.size] = \
+                    IMAGE.pack(d, flags, image_data)
+            w.out[node:node + ICON.size] = ICON.pack(NONE, name_offset, images_offset)
+            if previous is None:
+                bucket_offsets[b] = node
+            else:
+                w.out[previous:previous + 4] = struct.pack('>I', node)
+            previous = node
+    w.out[hash_offset:hash_offset + 4 + 4 * n_buckets] = struct.pack(f'>I{n_buckets}I', n_buckets, *bucket_offsets)
+
+    dir_offset = w.append(bytes(4 + 4 * len(directories)))
+    string_offsets = [w.string(d) for d in directories]
+    w.out[dir_offset:dir_offset + 4 + 4 * len(directories)] = \
+        struct.pack(f'>I{len(directories)}I', len(directories), *string_offsets)
+    w.out[:HEADER.size] = HEADER.pack(MAJOR_VERSION, MINOR_VERSION, hash_offset, dir_offset)
+    return bytes(w.out)
+
+
+def _write_meta(w, meta):
+    """Meta data block of a .icon file, followed by its lists; returns its offset."""
+    offset = w.append(bytes(META_DATA.size))
+    rect = attach = names = 0
+    if meta['rect']:
+        rect = w.append(struct.pack('>4H', *(v & 0xffff for v in meta['rect'])))
+    if meta['attach']:
+        attach = w.append(struct.pack('>I', len(meta['attach'])) +
+                          b''.join(struct.pack('>HH', x & 0xffff, y & 0xffff) for x, y in meta['attach']))
+    if meta['names']:
+        names = w.append(bytes(4 + 8 * len(meta['names'])))
+        entries = [(w.string(lang.encode()), w.string(name.encode())) for lang, name in meta['names']]
+        w.out[names:names + 4 + 8 * len(entries)] = struct.pack('>I', len(entries)) + \
+            b''.join(struct.pack('>II', *e) for e in entries)
+    w.out[offset:offset + META_DATA.size] = META_DATA.pack(rect, attach, names)
+    return offset
+
+
+def write_cache(theme_dir, dirs):
+    """Write atomically, so gtk never maps a half written cache."""
+    path = os.path.join(theme_dir, CACHE_NAME)
+    tmp = os.path.join(theme_dir, '.' + CACHE_NAME + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(build_cache(dirs))
+    os.replace(tmp, path)
+
+
+def update_cache(theme_dir, full=False):
+    """Rewrite the cache of `theme_dir`, incrementally unless `full`.
+    Returns (directories, icons, rescanned directories)."""
+    previous = None if full else read_cache(theme_dir)
+    since = os.stat(os.path.join(theme_dir, CACHE_NAME)).st_mtime if previous else None
+    dirs, rescanned = scan_theme(theme_dir, previous, since)
+    write_cache(theme_dir, dirs)
+    icons = set(name for d in dirs.values() for name in d)
+    return len(dirs), len(icons), rescanned
+
+
+# --- verifying ---------------------------------------------------------------
+
+def verify_cache(theme_dir):
+    """Problems of the cache of `theme_dir` compared with a full scan, as strings."""
+    cache = read_cache(theme_dir)
+    if cache is None:
+        return [f"no readable {CACHE_NAME}"]
+    problems = []
+    cache_mtime = os.stat(os.path.join(theme_dir, CACHE_NAME)).st_mtime
+    dirs, rescanned = scan_theme(theme_dir)
+    for d in sorted(set(dirs) | set(cache.dirs)):
+        on_disk = dirs.get(d, {})
+        cached = cache.dirs.get(d, {})
+        path = os.path.join(os.fsencode(theme_dir), d)
+        if os.path.isdir(path) and os.stat(path).st_mtime > cache_mtime:
+            problems.append(f"{d.decode()}: directory is newer than the cache")
+        for name in sorted(set(on_disk) | set(cached)):
+            where = f"{d.decode()}/{name.decode(errors='replace')}"
+            if name not in cached:
+                problems.append(f"{where}: not in the cache")
+            elif name not in on_disk:
+                problems.append(f"{where}: in the cache but not on disk")
+            elif on_disk[name] != cached[name]:
+                problems.append(f"{where}: cached as {cached[name]}, on disk {on_disk[name]}")
+            for suffix, flag in SUFFIXES.items():
+                if cached.get(name, (0, None))[0] & flag and not os.path.isfile(
+                        os.path.join(path, name + suffix)):
+                    problems.append(f"{where}{suffix.decode()}: cached, but the file does not resolve")
+    # every name must also be reachable through its hash bucket
+    for name in sorted(set(n for d in cache.dirs.values() for n in d)):
+        if not cache.lookup(name):
+            problems.append(f"{name.decode(errors='replace')}: not found through the hash table")
+    return problems
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    theme_dir = args[0] if args else DEFAULT_THEME
+    if not os.path.isfile(os.path.join(theme_dir, 'index.theme')):
+        print(f"ERROR: {theme_dir} is not an icon theme (no index.theme)")
+        sys.exit(1)
+
+    if '--verify' in sys.argv:
+        problems = verify_cache(theme_dir)
+        for p in problems:
+            print(f"  {p}")
+        print(f"{os.path.join(theme_dir, CACHE_NAME)}: {len(problems)} problems")
+        sys.exit(1 if problems else 0)
+
+    n_dirs, n_icons, rescanned = update_cache(theme_dir, full='--full' in sys.argv)
+    print(f"Wrote {os.path.join(theme_dir, CACHE_NAME)}: {n_icons} icons in {n_dirs} directories "
+          f"({rescanned} directories rescanned)")
+
+
+if __name__ == '__main__':
+    main()
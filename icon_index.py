@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Icon name resolution for the icon themes, without walking the tree.
+Answers "which file serves `folder` at 32px" the way GTK would: the
+freedesktop icon theme lookup (LookupIcon/FindIcon), inherited themes and
+hicolor included.
+
+Usage:
+    python3 icon_index.py folder user-home         # the files serving the names at 32px
+    python3 icon_index.py --size 48 --scale 2 folder
+    python3 icon_index.py --all folder             # every (size, scale, context, path) of a name
+    python3 icon_index.py --missing                # standard icon names nothing resolves
+    python3 icon_index.py --orphans                # files no lookup can return
+    python3 icon_index.py --theme ~/.icons/Chicago95-tux-Crimson folder
+
+--theme takes a theme directory or a theme name searched in .icons,
+~/.icons, $XDG_DATA_HOME/icons and $XDG_DATA_DIRS/icons; it defaults to
+.icons/Chicago95-tux. Exit status is 1 when a name does not resolve or
+--missing/--orphans found something.
+
+Each theme's index.theme is parsed once for the size, scale, context and
+type of its directories. Names are looked up in the theme's icon-theme.cache
+(icon_cache.py), mmapped, so a lookup reads one hash chain instead of
+listing directories. A theme whose cache is missing or older than one of its
+directories is scanned once instead, as GTK would.
+"""
+
+import os
+import sys
+import configparser
+
+import icon_cache
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_THEME = icon_cache.DEFAULT_THEME
+FALLBACK_THEME = 'hicolor'
+PIXMAPS_DIR = '/usr/share/pixmaps'
+
+# in lookup order, with the suffix flag the cache stores for each
+EXTENSIONS = [('.png', icon_cache.HAS_SUFFIX_PNG), ('.svg', icon_cache.HAS_SUFFIX_SVG),
+              ('.xpm', icon_cache.HAS_SUFFIX_XPM)]
+
+# The names of the freedesktop Icon Naming Specification, by context
+STANDARD_ICONS = {
+    'Actions': """
+        address-book-new application-exit appointment-new call-start call-stop contact-new
+        document-new document-open document-open-recent document-page-setup document-print
+        document-print-preview document-properties document-revert document-save
+        document-save-as document-send edit-clear edit-copy edit-cut edit-delete edit-find
+        edit-find-replace edit-paste edit-redo edit-select-all edit-undo folder-new
+        format-indent-less format-indent-more format-justify-center format-justify-fill
+        format-justify-left format-justify-right format-text-direction-ltr
+        format-text-direction-rtl format-text-bold format-text-italic format-text-underline
+        format-text-strikethrough go-bottom go-down go-first go-home go-jump go-last go-next
+        go-previous go-top go-up help-about help-contents help-faq insert-image insert-link
+        insert-object insert-text list-add list-remove mail-forward mail-mark-important
+        mail-mark-junk mail-mark-notjunk mail-mark-read mail-mark-unread mail-message-new
+        mail-reply-all mail-reply-sender mail-send mail-send-receive media-eject
+        media-playback-pause media-playback-start media-playback-stop media-record
+        media-seek-backward media-seek-forward media-skip-backward media-skip-forward
+        object-flip-horizontal object-flip-vertical object-rotate-left object-rotate-right
+        process-stop system-lock-screen system-log-out system-run system-search system-reboot
+        system-shutdown tools-check-spelling view-fullscreen view-refresh view-restore
+        view-sort-ascending view-sort-descending window-close window-new zoom-fit-best zoom-in
+        zoom-original zoom-out""",
+    'Animations': "process-working",
+    'Applications': """
+        accessories-calculator accessories-character-map accessories-dictionary
+        accessories-text-editor help-browser multimedia-volume-control
+        preferences-desktop-accessibility preferences-desktop-font preferences-desktop-keyboard
+        preferences-desktop-locale preferences-desktop-multimedia preferences-desktop-screensaver
+        preferences-desktop-theme preferences-desktop-wallpaper system-file-manager
+        system-software-install system-software-update utilities-system-monitor
+        utilities-terminal""",
+    'Categories': """
+        applications-accessories applications-development applications-engineering
+        applications-games applications-graphics applications-internet applications-multimedia
+        applications-office applications-other applications-science applications-system
+        applications-utilities preferences-desktop preferences-desktop-peripherals
+        preferences-desktop-personal preferences-other preferences-system
+        preferences-system-network system-help""",
+    'Devices': """
+        audio-card audio-input-microphone battery camera-photo camera-video camera-web computer
+        drive-harddisk drive-optical drive-removable-media input-gaming input-keyboard
+        input-mouse input-tablet media-flash media-floppy media-optical media-tape modem
+        multimedia-player network-wired network-wireless pda phone printer scanner
+        video-display""",
+    'Emblems': """
+        emblem-default emblem-documents emblem-downloads emblem-favorite emblem-important
+        emblem-mail emblem-photos emblem-readonly emblem-shared emblem-symbolic-link
+        emblem-synchronized emblem-system emblem-unreadable""",
+    'Emotes': """
+        face-angel face-angry face-cool face-crying face-devilish face-embarrassed face-kiss
+        face-laugh face-monkey face-plain face-raspberry face-sad face-sick face-smile
+        face-smile-big face-smirk face-surprise face-tired face-uncertain face-wink
+        face-worried""",
+    'MimeTypes': """
+        application-x-executable audio-x-generic font-x-generic image-x-generic
+        package-x-generic text-html text-x-generic text-x-generic-template text-x-script
+        video-x-generic x-office-address-book x-office-calendar x-office-document
+        x-office-presentation x-office-spreadsheet""",
+    'Places': """
+        folder folder-remote network-server network-workgroup start-here user-bookmarks
+        user-desktop user-home user-trash""",
+    'Status': """
+        appointment-missed appointment-soon audio-volume-high audio-volume-low
+        audio-volume-medium audio-volume-muted battery-caution battery-low dialog-error
+        dialog-information dialog-password dialog-question dialog-warning folder-drag-accept
+        folder-open folder-visiting image-loading image-missing mail-attachment mail-unread
+        mail-read mail-replied mail-signed mail-signed-verified media-playlist-repeat
+        media-playlist-shuffle network-error network-idle network-offline network-receive
+        network-transmit network-transmit-receive printer-error printer-printing security-high
+        security-medium security-low software-update-available software-update-urgent
+        sync-error sync-synchronizing task-due task-past-due user-available user-away
+        user-idle user-offline user-trash-full weather-clear weather-clear-night
+        weather-few-clouds weather-few-clouds-night weather-fog weather-overcast
+        weather-severe-alert weather-showers weather-showers-scattered weather-snow
+        weather-storm""",
+}
+STANDARD_ICONS = {context: names.split() for context, names in STANDARD_ICONS.items()}
+
+
+def theme_search_path():
+    """Base directories holding icon themes, in the spec's order, this
+    repository's .icons first."""
+    home = os.path.expanduser('~')
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(home, '.local', 'share')
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+    return ([os.path.join(SCRIPT_DIR, '.icons'), os.path.join(home, '.icons'),
+             os.path.join(data_home, 'icons')]
+            + [os.path.join(d, 'icons') for d in data_dirs.split(':') if d])
+
+
+class ThemeDirectory:
+    """One [subdir] of index.theme, with the spec's defaults."""
+
+    def __init__(self, name, section):
+        self.name = name
+        self.size = int(section['Size'])
+        self.scale = int(section.get('Scale', 1))
+        self.context = section.get('Context', '')
+        self.type = section.get('Type', 'Threshold')
+        self.min_size = int(section.get('MinSize', self.size))
+        self.max_size = int(section.get('MaxSize', self.size))
+        self.threshold = int(section.get('Threshold', 2))
+
+    def matches_size(self, size, scale):
+        """DirectoryMatchesSize of the spec."""
+        if self.scale != scale:
+            return False
+        if self.type == 'Fixed':
+            return self.size == size
+        if self.type == 'Scalable':
+            return self.min_size <= size <= self.max_size
+        return self.size - self.threshold <= size <= self.size + self.threshold
+
+    def size_distance(self, size, scale):
+        """DirectorySizeDistance of the spec."""
+        wanted = size * scale
+        if self.type == 'Fixed':
+            return abs(self.size * self.scale - wanted)
+        if self.type == 'Scalable':
+            low, high = self.min_size, self.max_size
+        else:
+            low, high = self.size - self.threshold, self.size + self.threshold
+        if wanted < low * self.scale:
+            return low * self.scale - wanted
+        if wanted > high * self.scale:
+            return wanted - high * self.scale
+        return 0
+
+
+class IconTheme:
+    """One icon theme: the directories of its index.theme and a name index,
+    the theme's mmapped icon-theme.cache when it is current, else a scan."""
+
+    def __init__(self, path):
+        self.path = path
+        index = configparser.ConfigParser(interpolation=None, strict=False)
+        index.optionxform = str
+        if not index.read(os.path.join(path, 'index.theme')) or not index.has_section('Icon Theme'):
+            raise ValueError(f"{path} is not an icon theme (no index.theme)")
+        section = index['Icon Theme']
+        self.name = section.get('Name', os.path.basename(path))
+        self.parents = [p.strip() for p in section.get('Inherits', '').split(',') if p.strip()]
+        self.directories = []
+        for key in ('Directories', 'ScaledDirectories'):
+            for name in section.get(key, '').split(','):
+                name = name.strip()
+                if name and index.has_section(name) and 'Size' in index[name]:
+                    self.directories.append(ThemeDirectory(name, index[name]))
+        self.cache = icon_cache.map_cache(path) if self.cache_is_current() else None
+        self._scanned = None
+
+    def cache_is_current(self):
+        """GTK's test: the cache is used unless a directory is newer."""
+        try:
+            cache_mtime = os.stat(os.path.join(self.path, icon_cache.CACHE_NAME)).st_mtime
+        except OSError:
+            return False
+        for d in self.directories:
+            try:
+                if os.stat(os.path.join(self.path, d.name)).st_mtime > cache_mtime:
+                    return False
+            except OSError:
+                pass
+        return True
+
+    def images(self, name):
+        """{directory: suffix flags} of icon `name` in this theme."""
+        key = os.fsencode(name)
+        if self.cache is not None:
+            return {d.decode(): flags for d, flags in self.cache.lookup(key)}
+        if self._scanned is None:
+            dirs, rescanned = icon_cache.scan_theme(self.path)
+            self._scanned = {}
+            for d, icons in dirs.items():
+                for icon, (flags, meta) in icons.items():
+                    self._scanned.setdefault(icon, {})[d.decode()] = flags
+        return self._scanned.get(key, {})
+
+    def file_name(self, directory, name, flags):
+        for ext, flag in EXTENSIONS:
+            if flags & flag:
+                return os.path.join(self.path, directory.name, name + ext)
+        return None
+
+    def lookup_icon(self, name, size, scale=1):
+        """LookupIcon of the spec: the file of `name` in this theme alone, from
+        a directory matching the size, else from the closest one."""
+        images = self.images(name)
+        closest = None
+        for d in self.directories:
+            path = self.file_name(d, name, images.get(d.name, 0))
+            if path is None:
+                continue
+            if d.matches_size(size, scale):
+                return path
+            distance = d.size_distance(size, scale)
+            if closest is None or distance < closest[0]:
+                closest = (distance, path)
+        return closest[1] if closest else None
+
+    def entries(self, name):
+        """[(size, scale, context, path)] of every directory holding `name`."""
+        images = self.images(name)
+        found = []
+        for d in self.directories:
+            path = self.file_name(d, name, images.get(d.name, 0))
+            if path:
+                found.append((d.size, d.scale, d.context, path))
+        return found
+
+
+class IconIndex:
+    """A theme and the themes it inherits from, in the order FindIcon visits
+    them: the theme, its parents depth first, then hicolor."""
+
+    def __init__(self, theme=DEFAULT_THEME, search_path=None):
+        self.search_path = search_path if search_path is not None else theme_search_path()
+        self._themes = {}
+        self.theme = self.load(theme)
+        if self.theme is None:
+            raise ValueError(f"icon theme {theme} not found")
+        self.chain = []
+        self._walk(self.theme)
+        fallback = self.load(FALLBACK_THEME)
+        if fallback is not None and fallback not in self.chain:
+            self.chain.append(fallback)
+
+    def load(self, theme):
+        """IconTheme of a theme directory or theme name, None when not found."""
+        if theme not in self._themes:
+            candidates = [theme] if os.sep in theme else [os.path.join(base, theme) for base in self.search_path]
+            self._themes[theme] = None
+            for path in candidates:
+                if os.path.isfile(os.path.join(path, 'index.theme')):
+                    self._themes[theme] = IconTheme(path)
+                    break
+        return self._themes[theme]
+
+    def _walk(self, theme):
+        if theme in self.chain:
+            return
+        self.chain.append(theme)
+        for parent in theme.parents:
+            loaded = self.load(parent)
+            if loaded is not None:
+                self._walk(loaded)
+
+    def find_icon(self, name, size, scale=1):
+        """FindIcon of the spec: the file serving `name`, or None."""
+        for theme in self.chain:
+            path = theme.lookup_icon(name, size, scale)
+            if path:
+                return path
+        for ext, flag in EXTENSIONS:
+            path = os.path.join(PIXMAPS_DIR, name + ext)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def entries(self, name):
+        """[(size, scale, context, path)] of `name` in every theme of the chain."""
+        return [entry for theme in self.chain for entry in theme.entries(name)]
+
+    def missing_standard_names(self):
+        """{context: [standard names no theme of the chain has]}."""
+        missing = {}
+        for context, names in STANDARD_ICONS.items():
+            absent = [n for n in names if not any(theme.images(n) for theme in self.chain)]
+            if absent:
+                missing[context] = absent
+        return missing
+
+
+def find_orphans(theme):
+    """Files of `theme` no lookup can return, as (path, reason): icons in
+    directories index.theme does not list, broken symlinks, files with a
+    suffix themes do not use, and .icon files without an image."""
+    listed = set(d.name for d in theme.directories)
+    orphans = []
+    dirs, rescanned = icon_cache.scan_theme(theme.path)
+    for d in sorted(dirs):
+        name = d.decode()
+        if name not in listed and any(flags & ~icon_cache.HAS_ICON_FILE for flags, meta in dirs[d].values()):
+            orphans.append((os.path.join(theme.path, name), "directory not listed in index.theme"))
+    for name in sorted(listed):
+        folder = os.path.join(theme.path, name)
+        if not os.path.isdir(folder):
+            continue
+        files = sorted(os.listdir(folder))
+        images = set(os.path.splitext(f)[0] for f in files if f.endswith(('.png', '.svg', '.xpm')))
+        for f in files:
+            path = os.path.join(folder, f)
+            stem, ext = os.path.splitext(f)
+            if os.path.isdir(path):
+                continue
+            if not os.path.exists(path):
+                orphans.append((path, f"broken symlink to {os.readlink(path)}"))
+            elif ext == '.icon':
+                if stem not in images:
+                    orphans.append((path, ".icon file without an image"))
+            elif ext not in ('.png', '.svg', '.xpm'):
+                orphans.append((path, f"'{ext or f}' is not an icon suffix"))
+    return orphans
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--theme': DEFAULT_THEME, '--size': '32', '--scale': '1'}
+    for key in options:
+        if key in args:
+            options[key] = args[args.index(key) + 1]
+            del args[args.index(key):args.index(key) + 2]
+    flags = set(a for a in args if a.startswith('--'))
+    names = [a for a in args if not a.startswith('--')]
+    if not names and not flags & {'--missing', '--orphans'}:
+        print(__doc__.strip())
+        sys.exit(1)
+    try:
+        index = IconIndex(options['--theme'])
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    size, scale = int(options['--size']), int(options['--scale'])
+
+    failed = False
+    for name in names:
+        if '--all' in flags:
+            entries = index.entries(name)
+            for entry_size, entry_scale, context, path in entries:
+                print(f"{name}\t{entry_size}@{entry_scale}\t{context}\t{path}")
+            failed |= not entries
+        else:
+            path = index.find_icon(name, size, scale)
+            print(f"{name}\t{path or 'NOT FOUND'}")
+            failed |= path is None
+    if '--missing' in flags:
+        missing = index.missing_standard_names()
+        for context, absent in missing.items():
+            print(f"  MISSING  {context}: {' '.join(absent)}")
+        total = sum(len(n) for n in STANDARD_ICONS.values())
+        count = sum(len(a) for a in missing.values())
+        print(f"{index.theme.path}: {count} of {total} standard icon names do not resolve "
+              f"(themes: {', '.join(os.path.basename(t.path) for t in index.chain)})")
+        failed |= bool(missing)
+    if '--orphans' in flags:
+        orphans = find_orphans(index.theme)
+        for path, reason in orphans:
+            print(f"  ORPHAN   {os.path.relpath(path, index.theme.path)}: {reason}")
+        print(f"{index.theme.path}: {len(orphans)} orphaned files")
+        failed |= bool(orphans)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
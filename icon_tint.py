@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Palette-aware tinting of the Chicago95-tux icons.
+Builds a small overlay icon theme for one CDE palette: the icons of the
+selected contexts (by default places, i.e. the folders) with their Windows
+95 yellow and blue moved to colorset slots of the palette, and an
+index.theme that inherits Chicago95-tux for every other icon.
+
+Usage:
+    python3 icon_tint.py <name> <yellow> <blue>   # e.g. Test '#b24d7a' '#5a7d9e'
+    python3 icon_tint.py --context places,devices <name> <yellow> <blue>
+
+writes .icons/Chicago95-tux-<name>. generate-all-themes.py --icons and
+change-cde-colors.py --icons call tint_theme() with the background colors
+of the palette they apply (yellow -> slot 1, blue -> slot 2 by default).
+
+Only the distinct colors of an icon are remapped: the palette of an indexed
+PNG is rewritten in place, RGBA PNGs are mapped color by color and
+re-encoded with png_optimize, SVGs get their #rrggbb values replaced. An
+icon that has no color in a tinted hue band is left to the parent theme.
+Each overlay records the (icon hash, palette hash) of what it holds in
+.tint-manifest.json, so a rebuild only tints the icons that changed.
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import colorsys
+import hashlib
+import configparser
+
+import icon_cache
+import png_optimize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ICONS_DIR = os.path.join(SCRIPT_DIR, ".icons")
+PARENT_THEME = os.path.join(ICONS_DIR, "Chicago95-tux")
+MANIFEST = '.tint-manifest.json'
+TINT_VERSION = 1
+
+# (hue band in degrees, colorset slot whose background color it becomes)
+TINT_RULES = [
+    ((40, 80), 1),      # folder yellow #ffff00/#808000 -> active titlebar
+    ((200, 260), 2),    # blue #0000ff/#000080 -> inactive titlebar
+]
+TINT_CONTEXTS = ['places']
+# Colors grayer than this keep their color, so the gray bevels stay gray
+MIN_SATURATION = 0.2
+# Lightness of #ffff00 and #0000ff: a pixel this light gets the slot color
+# itself, darker and lighter shades keep their ratio to it
+REFERENCE_LIGHTNESS = 0.5
+
+SVG_COLOR = re.compile(rb'#([0-9a-fA-F]{6})\b')
+
+
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def tint_targets(colors, rules=TINT_RULES):
+    """[(hue band, (h, l, s) of the target)] from {slot: '#rrggbb'}."""
+    return [(band, colorsys.rgb_to_hls(*(v / 255 for v in hex_to_rgb(colors[slot]))))
+            for band, slot in rules]
+
+
+def tint_color(rgb, targets):
+    """`rgb` moved to the target of the first hue band it falls in."""
+    h, l, s = colorsys.rgb_to_hls(*(v / 255 for v in rgb))
+    if s < MIN_SATURATION:
+        return rgb
+    hue = h * 360
+    for (low, high), (th, tl, ts) in targets:
+        if low <= hue <= high:
+            light = min(1.0, l * tl / REFERENCE_LIGHTNESS)
+            return tuple(round(v * 255) for v in colorsys.hls_to_rgb(th, light, s * ts))
+    return rgb
+
+
+def tint_png(data, targets):
+    """The tinted PNG, or None when no color of `data` is in a hue band."""
+    chunks = png_optimize.read_chunks(data)
+    color_type = png_optimize.IHDR.unpack(chunks[0][1])[3]
+    if color_type == png_optimize.INDEXED:
+        # the pixels are indices: rewriting the 3 bytes per palette entry is enough
+        for i, (kind, payload) in enumerate(chunks):
+            if kind == b'PLTE':
+                entries = [payload[j:j + 3] for j in range(0, len(payload), 3)]
+                tinted = b''.join(bytes(tint_color(e, targets)) for e in entries)
+                if tinted == payload:
+                    return None
+                chunks[i] = (kind, tinted)
+        return png_optimize.PNG_SIGNATURE + b''.join(png_optimize.write_chunk(kind, payload)
+                                                     for kind, payload in chunks)
+
+    image = png_optimize.decode_png(data)
+    width, height, depth = image[0], image[1], image[3]
+    pixels = png_optimize.to_rgba(*image)
+    if depth == 16:
+        pixels = pixels[0::2]
+    colors = {}
+    for i in range(0, len(pixels), 4):
+        color = pixels[i:i + 4]
+        if color not in colors:
+            colors[color] = bytes(tint_color(color[:3], targets)) + color[3:]
+    if all(color == tinted for color, tinted in colors.items()):
+        return None
+    return png_optimize.encode_rgba(width, height,
+                                    b''.join(colors[pixels[i:i + 4]] for i in range(0, len(pixels), 4)))
+
+
+def tint_svg(data, targets):
+    """The tinted SVG, or None when none of its #rrggbb colors change."""
+    colors = {}
+    for value in set(SVG_COLOR.findall(data)):
+        tinted = '{:02x}{:02x}{:02x}'.format(*tint_color(hex_to_rgb(value.decode()), targets))
+        if tinted != value.decode().lower():
+            colors[value] = tinted.encode()
+    if not colors:
+        return None
+    return SVG_COLOR.sub(lambda m: b'#' + colors.get(m.group(1), m.group(1)), data)
+
+
+def tint_data(data, ext, targets):
+    """Tinted bytes of an icon file or None, for .png and .svg files."""
+    try:
+        return tint_svg(data, targets) if ext == '.svg' else tint_png(data, targets)
+    except ValueError:
+        return None
+
+
+def load_manifest(overlay_dir, palette_key):
+    """{icon sha1: overlay file holding it tinted, or None} of an earlier
+    build with the same palette hash."""
+    try:
+        with open(os.path.join(overlay_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get('palette') != palette_key:
+        return {}
+    return manifest.get('icons', {})
+
+
+def overlay_path(name):
+    """Where the overlay theme of palette `name` goes: .icons/Chicago95-tux-<name>."""
+    return os.path.join(ICONS_DIR, f"{os.path.basename(PARENT_THEME)}-{name}")
+
+
+def read_index_theme(theme_dir):
+    index = configparser.ConfigParser(interpolation=None, strict=False)
+    index.optionxform = str
+    index.read(os.path.join(theme_dir, 'index.theme'))
+    return index
+
+
+def gen_index_theme(name, parent, directories, index):
+    lines = ["[Icon Theme]",
+             f"Name={parent} - {name}",
+             f"Comment={parent} folders tinted for the {name} CDE palette",
+             f"Inherits={parent}",
+             f"Directories={','.join(directories)}",
+             ""]
+    for directory in directories:
+        lines.append(f"[{directory}]")
+        lines += [f"{key}={value}" for key, value in index[directory].items()]
+        lines.append("")
+    return "\n".join(lines)
+
+
+_parent_cache = {}
+
+
+def scan_parent(parent_dir, contexts):
+    """(index.theme, directories of `contexts`, {icon path: real file},
+    {real file: (bytes, sha1)}) of the parent theme. Scanned once per run,
+    generate-all-themes.py tints the same icons for every palette."""
+    key = (os.path.realpath(parent_dir), contexts)
+    if key not in _parent_cache:
+        index = read_index_theme(parent_dir)
+        directories = [d for d in index['Icon Theme']['Directories'].split(',')
+                       if d.split('/')[0] in contexts and index.has_section(d)]
+        # every icon of the contexts, symlinks included, by its real file
+        entries = {}
+        for directory in directories:
+            folder = os.path.join(parent_dir, directory)
+            if os.path.isdir(folder):
+                for fn in sorted(os.listdir(folder)):
+                    path = os.path.join(folder, fn)
+                    if fn.endswith(('.png', '.svg')) and os.path.isfile(path):
+                        entries[f"{directory}/{fn}"] = os.path.realpath(path)
+        sources = {}
+        for real in set(entries.values()):
+            with open(real, 'rb') as f:
+                data = f.read()
+            sources[real] = (data, hashlib.sha1(data).hexdigest())
+        _parent_cache[key] = (index, directories, entries, sources)
+    return _parent_cache[key]
+
+
+def tint_theme(overlay_dir, name, colors, parent_dir=PARENT_THEME, contexts=TINT_CONTEXTS):
+    """Write the overlay theme `overlay_dir` for palette `name`, whose
+    colorset backgrounds are `colors` ({slot: '#rrggbb'}, or the bg list of
+    compute_colorset()). Returns (icons written, cache hits)."""
+    targets = tint_targets(colors)
+    palette_key = hashlib.sha1(repr((TINT_VERSION, MIN_SATURATION, REFERENCE_LIGHTNESS,
+                                     targets)).encode()).hexdigest()
+    parent = os.path.basename(os.path.normpath(parent_dir))
+    real_parent = os.path.realpath(parent_dir)
+    index, directories, entries, sources = scan_parent(parent_dir, tuple(contexts))
+
+    previous = load_manifest(overlay_dir, palette_key)
+    tinted = {}
+    hits = 0
+    for real, (data, digest) in sorted(sources.items()):
+        kept = previous.get(digest, False)
+        if kept is None:
+            tinted[real] = None
+            hits += 1
+        elif kept and os.path.isfile(os.path.join(overlay_dir, kept)):
+            with open(os.path.join(overlay_dir, kept), 'rb') as f:
+                tinted[real] = f.read()
+            hits += 1
+        else:
+            tinted[real] = tint_data(data, os.path.splitext(real)[1], targets)
+    changed = {rel: real for rel, real in entries.items() if tinted[real] is not None}
+
+    if os.path.exists(overlay_dir):
+        shutil.rmtree(overlay_dir)
+    os.makedirs(overlay_dir)
+    for rel, real in sorted(changed.items()):
+        path = os.path.join(overlay_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        target = os.path.relpath(real, real_parent)
+        source = os.path.join(parent_dir, rel)
+        if os.path.islink(source) and target != rel and target in changed:
+            # keep the parent's aliases as links inside the overlay
+            os.symlink(os.path.relpath(os.path.join(overlay_dir, target), os.path.dirname(path)), path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(tinted[real])
+    written = {}
+    for rel, real in sorted(changed.items()):
+        written.setdefault(real, rel)
+    with open(os.path.join(overlay_dir, MANIFEST), 'w') as f:
+        json.dump({'version': TINT_VERSION, 'palette': palette_key,
+                   'icons': {sources[real][1]: written.get(real) for real in tinted}},
+                  f, indent=1, sort_keys=True)
+    used = [d for d in directories if any(rel.startswith(d + '/') for rel in changed)]
+    with open(os.path.join(overlay_dir, 'index.theme'), 'w') as f:
+        f.write(gen_index_theme(name, parent, used, index))
+    icon_cache.update_cache(overlay_dir, full=True)
+    return len(changed), hits
+
+
+def main():
+    args = sys.argv[1:]
+    contexts = TINT_CONTEXTS
+    if '--context' in args:
+        contexts = args[args.index('--context') + 1].split(',')
+        del args[args.index('--context'):args.index('--context') + 2]
+    if len(args) != 3:
+        print(__doc__.strip())
+        sys.exit(1)
+    name, yellow, blue = args
+    overlay_dir = overlay_path(name)
+    written, hits = tint_theme(overlay_dir, name, {1: yellow, 2: blue}, contexts=contexts)
+    print(f"Wrote {overlay_dir}: {written} icons ({hits} from the cache)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Font installer for dom0.
+Copies .fonts to ~/.fonts, writes the X core font indexes (fonts.dir,
+fonts.scale) of every font directory it installs, listing the fonts that
+were already there as well, and a fontconfig drop-in that lists those
+directories and accepts their bitmap fonts, which Fedora's
+70-no-bitmaps.conf would otherwise hide.
+
+Usage:
+    python3 install-fonts.py                 # install into ~/.fonts
+    python3 install-fonts.py --dest DIR      # install into DIR
+    python3 install-fonts.py --dry-run       # only report what would change
+    python3 install-fonts.py --list          # print the XLFD names of .fonts
+
+Instead of `fc-cache -f`, which rescans every font directory of the system,
+only the directories whose fonts changed are passed to fc-cache, and a run
+that changes nothing does not start it at all. Files are compared by size
+and mtime (copies keep the mtime), the indexes are rewritten only when
+their content changes. When fc-cache is missing or fails, the directories
+are kept in DEST/.fc-cache-pending and the next run passes them to
+fc-cache again, even if nothing else changed; the run exits with 1.
+
+The XLFD names are built from the font files themselves, parsed in pure
+Python: family, style and foundry from the name table, the strike sizes of
+bitmap fonts (the Cronyx .otb files) from EBLC, and the encodings from the
+Unicode cmap, listing every 8-bit charset the font covers completely.
+"""
+
+import os
+import sys
+import shutil
+import struct
+import subprocess
+from xml.sax.saxutils import escape
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FONTS_DIR = os.path.join(SCRIPT_DIR, ".fonts")
+DEFAULT_DEST = os.path.expanduser("~/.fonts")
+CONFIG_HOME = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser("~/.config")
+DROP_IN = os.path.join(CONFIG_HOME, "fontconfig", "conf.d", "70-cde-fonts.conf")
+FONT_EXTS = ('.otb', '.ttf', '.otf')
+PENDING = '.fc-cache-pending'
+
+SFNT_HEADER = struct.Struct('>IH')             # version, table count
+TABLE_RECORD = struct.Struct('>4sIII')         # tag, checksum, offset, length
+NAME_RECORD = struct.Struct('>6H')             # platform, encoding, language, name id, length, offset
+BITMAP_SIZE = struct.Struct('>40xHHBBBb')      # start/end glyph, ppem x/y, bit depth, flags
+
+# name ids
+FAMILY, SUBFAMILY, MANUFACTURER = 1, 2, 8
+
+# 8-bit charsets listed when the cmap covers their ASCII and letters:
+# (XLFD registry-encoding, Python codec)
+CHARSETS = [
+    ('iso8859-1', 'latin-1'),
+    ('iso8859-2', 'iso8859-2'),
+    ('iso8859-5', 'iso8859-5'),
+    ('iso8859-15', 'iso8859-15'),
+    ('koi8-r', 'koi8-r'),
+    ('koi8-u', 'koi8-u'),
+    ('microsoft-cp1251', 'cp1251'),
+    ('microsoft-cp1252', 'cp1252'),
+    ('ibm-cp437', 'cp437'),
+    ('ibm-cp866', 'cp866'),
+]
+RESOLUTION = 75
+
+
+def read_tables(data):
+    """{tag: bytes} of an sfnt (TrueType/OpenType) font."""
+    version, count = SFNT_HEADER.unpack_from(data)
+    if version not in (0x00010000, 0x4f54544f, 0x74727565):     # 1.0, 'OTTO', 'true'
+        raise ValueError("not an sfnt font")
+    tables = {}
+    for i in range(count):
+        tag, checksum, offset, length = TABLE_RECORD.unpack_from(data, 12 + i * TABLE_RECORD.size)
+        tables[tag] = data[offset:offset + length]
+    return tables
+
+
+def read_names(name):
+    """{name id: string}, preferring the Windows Unicode records."""
+    fmt, count, storage = struct.unpack_from('>HHH', name)
+    names = {}
+    for i in range(count):
+        platform, encoding, language, name_id, length, offset = \
+            NAME_RECORD.unpack_from(name, 6 + i * NAME_RECORD.size)
+        raw = name[storage + offset:storage + offset + length]
+        if platform == 3 and encoding in (0, 1, 10) and language == 0x409:
+            names[name_id] = raw.decode('utf-16-be', 'replace')
+        elif platform == 1 and encoding == 0 and name_id not in names:
+            names[name_id] = raw.decode('mac-roman', 'replace')
+    return names
+
+
+def read_cmap(cmap):
+    """Code points of the Unicode cmap subtable (format 4 or 12)."""
+    count = struct.unpack_from('>H', cmap, 2)[0]
+    subtables = {}
+    for i in range(count):
+        platform, encoding, offset = struct.unpack_from('>HHI', cmap, 4 + i * 8)
+        subtables[(platform, encoding)] = offset
+    for key in ((3, 10), (0, 4), (3, 1), (0, 3)):
+        if key not in subtables:
+            continue
+        offset = subtables[key]
+        fmt = struct.unpack_from('>H', cmap, offset)[0]
+        codes = set()
+        if fmt == 4:
+            segments = struct.unpack_from('>H', cmap, offset + 6)[0] // 2
+            ends = struct.unpack_from(f'>{segments}H', cmap, offset + 14)
+            starts = struct.unpack_from(f'>{segments}H', cmap, offset + 16 + segments * 2)
+            deltas = struct.unpack_from(f'>{segments}H', cmap, offset + 16 + segments * 4)
+            range_base = offset + 16 + segments * 6
+            range_offsets = struct.unpack_from(f'>{segments}H', cmap, range_base)
+            for i, (start, end) in enumerate(zip(starts, ends)):
+                for code in range(start, end + 1):
+                    if code == 0xffff:
+                        continue
+                    if range_offsets[i]:
+                        at = range_base + i * 2 + range_offsets[i] + (code - start) * 2
+                        glyph = struct.unpack_from('>H', cmap, at)[0]
+                        glyph = (glyph + deltas[i]) & 0xffff if glyph else 0
+                    else:
+                        glyph = (code + deltas[i]) & 0xffff
+                    if glyph:
+                        codes.add(code)
+        elif fmt == 12:
+            groups = struct.unpack_from('>I', cmap, offset + 12)[0]
+            for i in range(groups):
+                start, end, glyph = struct.unpack_from('>III', cmap, offset + 16 + i * 12)
+                codes.update(range(start, end + 1))
+        else:
+            continue
+        return codes
+    return set()
+
+
+def covered_charsets(codes):
+    """XLFD registry-encodings of `codes`: every 8-bit charset whose ASCII and
+    letters it all has (the Cronyx fonts lack the box drawing of koi8-r, like
+    their BDF originals), then iso10646-1."""
+    found = []
+    for registry, codec in CHARSETS:
+        chars = bytes(range(0x80, 0x100)).decode(codec, 'ignore')
+        wanted = set(range(0x20, 0x7f)) | set(ord(c) for c in chars if c.isalpha())
+        if wanted <= codes:
+            found.append(registry)
+    return found + ['iso10646-1'] if codes else found
+
+
+def font_info(path):
+    """Family, style, foundry, spacing, strikes and encodings of a font file."""
+    with open(path, 'rb') as f:
+        tables = read_tables(f.read())
+    names = read_names(tables[b'name'])
+    style = names.get(SUBFAMILY, 'Regular')
+    mac_style = struct.unpack_from('>H', tables[b'head'], 44)[0]
+    units_per_em = struct.unpack_from('>H', tables[b'head'], 18)[0]
+    manufacturer = names.get(MANUFACTURER, '').strip().lower()
+    strikes = []
+    if b'EBLC' in tables:
+        eblc = tables[b'EBLC']
+        for i in range(struct.unpack_from('>I', eblc, 4)[0]):
+            start, end, ppem_x, ppem_y, depth, flags = BITMAP_SIZE.unpack_from(eblc, 8 + i * 48)
+            strikes.append(ppem_y)
+    average = struct.unpack_from('>h', tables[b'OS/2'], 2)[0] if b'OS/2' in tables else 0
+    return {
+        'family': names.get(FAMILY, os.path.splitext(os.path.basename(path))[0]),
+        'weight': 'bold' if mac_style & 1 or 'Bold' in style else 'medium',
+        'slant': 'o' if 'Oblique' in style else 'i' if mac_style & 2 or 'Italic' in style else 'r',
+        'foundry': manufacturer if manufacturer.isalnum() else 'misc',
+        'spacing': 'm' if struct.unpack_from('>I', tables[b'post'], 12)[0] else 'p',
+        'average': average / units_per_em,
+        'strikes': sorted(set(strikes)),
+        'encodings': covered_charsets(read_cmap(tables[b'cmap'])),
+    }
+
+
+def xlfd_names(info):
+    """XLFD font names of a font: the 0-sized scalable names when it has no
+    bitmap strikes, else one name per strike. One name per encoding."""
+    prefix = (f"-{info['foundry']}-{info['family'].lower()}-{info['weight']}-{info['slant']}"
+              f"-normal-")
+    if info['strikes']:
+        sizes = [f"{px}-{round(px * 720 / RESOLUTION)}-{RESOLUTION}-{RESOLUTION}"
+                 f"-{info['spacing']}-{round(px * info['average'] * 10)}" for px in info['strikes']]
+    else:
+        sizes = [f"0-0-0-0-{info['spacing']}-0"]
+    return [f"{prefix}-{size}-{encoding}" for size in sizes for encoding in info['encodings']]
+
+
+def read_index(path):
+    """{file name: [index lines]} of an existing fonts.scale or fonts.dir."""
+    entries = {}
+    try:
+        with open(path, errors='replace') as f:
+            lines = f.read().splitlines()[1:]
+    except OSError:
+        return entries
+    for line in lines:
+        fn = line.split(' ', 1)[0]
+        if fn:
+            entries.setdefault(fn, []).append(line)
+    return entries
+
+
+def font_index(font_dir, incoming=None):
+    """(fonts.scale, fonts.dir) contents of `font_dir`, as mkfontscale and
+    mkfontdir would write them, covering every font in it, not only ours.
+    The fonts of the `incoming` directory are indexed as if already copied
+    into `font_dir` (for --dry-run). Files this module cannot read, such as
+    .pcf fonts or a font that fails to parse, keep their lines of the
+    existing indexes."""
+    files = {}
+    if os.path.isdir(font_dir):
+        files = {fn: os.path.join(font_dir, fn) for fn in os.listdir(font_dir)}
+    if incoming:
+        files.update((fn, os.path.join(incoming, fn)) for fn in os.listdir(incoming)
+                     if fn.lower().endswith(FONT_EXTS))
+    old_scale = read_index(os.path.join(font_dir, 'fonts.scale'))
+    old_dir = read_index(os.path.join(font_dir, 'fonts.dir'))
+    scalable, bitmap = [], []
+    for fn in sorted(files):
+        if fn.lower().endswith(FONT_EXTS):
+            try:
+                info = font_info(files[fn])
+            except (KeyError, ValueError, struct.error) as e:
+                print(f"  SKIP     {files[fn]}: {e or 'unreadable font'}")
+            else:
+                lines = [f"{fn} {name}" for name in xlfd_names(info)]
+                (bitmap if info['strikes'] else scalable).extend(lines)
+                continue
+        scale_lines = old_scale.get(fn, [])
+        scalable += scale_lines
+        bitmap += [line for line in old_dir.get(fn, []) if line not in scale_lines]
+
+    def index(lines):
+        return ''.join(f"{line}\n" for line in [str(len(lines))] + lines)
+    return index(scalable), index(scalable + bitmap)
+
+
+def gen_drop_in(dest, bitmap_dirs):
+    lines = ['<?xml version="1.0"?>',
+             '<!DOCTYPE fontconfig SYSTEM "urn:fontconfig:fonts.dtd">',
+             '<!-- Written by install-fonts.py (qubes-dom0-cde-themes) -->',
+             '<fontconfig>']
+    lines.append(f'  <dir>{escape(dest)}</dir>')
+    lines += ['  <selectfont>', '    <acceptfont>']
+    lines += [f'      <glob>{escape(d)}/*.otb</glob>' for d in bitmap_dirs]
+    lines += ['    </acceptfont>', '  </selectfont>', '</fontconfig>', '']
+    return "\n".join(lines)
+
+
+def write_if_changed(path, content, dry_run):
+    """Write `content` to `path` unless it already holds it; True if it did not."""
+    try:
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    if not dry_run:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    return True
+
+
+def install(source, dest, dry_run=False):
+    """Copy the fonts of `source` to `dest` and write the indexes. Returns
+    ({font dir: files copied}, indexes written)."""
+    changed = {}
+    font_dirs = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames.sort()
+        fonts = sorted(fn for fn in filenames if fn.lower().endswith(FONT_EXTS))
+        if not fonts:
+            continue
+        target_dir = os.path.normpath(os.path.join(dest, os.path.relpath(dirpath, source)))
+        font_dirs.append((dirpath, target_dir))
+        for fn in fonts:
+            src, dst = os.path.join(dirpath, fn), os.path.join(target_dir, fn)
+            st = os.stat(src)
+            try:
+                dt = os.stat(dst)
+                if (dt.st_size, int(dt.st_mtime)) == (st.st_size, int(st.st_mtime)):
+                    continue
+            except OSError:
+                pass
+            print(f"  {'WOULD ' if dry_run else ''}COPY  {dst}")
+            if not dry_run:
+                os.makedirs(target_dir, exist_ok=True)
+                shutil.copy2(src, dst)
+            changed.setdefault(target_dir, []).append(fn)
+
+    written = 0
+    for source_dir, font_dir in font_dirs:
+        # the whole target directory is indexed, it may hold the user's own fonts
+        scale, fonts_dir = font_index(font_dir, source_dir if dry_run else None)
+        for name, content in (('fonts.scale', scale), ('fonts.dir', fonts_dir)):
+            if write_if_changed(os.path.join(font_dir, name), content, dry_run):
+                print(f"  {'WOULD ' if dry_run else ''}WRITE {os.path.join(font_dir, name)}")
+                changed.setdefault(font_dir, [])
+                written += 1
+    bitmap_dirs = [target for source_dir, target in font_dirs
+                   if any(fn.lower().endswith('.otb') for fn in os.listdir(source_dir))]
+    if write_if_changed(DROP_IN, gen_drop_in(dest, bitmap_dirs), dry_run):
+        print(f"  {'WOULD ' if dry_run else ''}WRITE {DROP_IN}")
+        written += 1
+    return changed, written
+
+
+def update_font_cache(font_dirs):
+    """fc-cache of only `font_dirs`, not the whole system; False without fc-cache."""
+    if not shutil.which('fc-cache'):
+        return False
+    return subprocess.run(['fc-cache'] + sorted(font_dirs)).returncode == 0
+
+
+def read_pending(dest):
+    """Font directories an earlier run could not pass to fc-cache."""
+    try:
+        with open(os.path.join(dest, PENDING)) as f:
+            return {line for line in f.read().splitlines() if os.path.isdir(line)}
+    except OSError:
+        return set()
+
+
+def write_pending(dest, font_dirs):
+    path = os.path.join(dest, PENDING)
+    if font_dirs:
+        write_if_changed(path, ''.join(f"{d}\n" for d in sorted(font_dirs)), False)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def main():
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args or '-n' in args
+    dest = DEFAULT_DEST
+    if '--dest' in args:
+        dest = os.path.abspath(os.path.expanduser(args[args.index('--dest') + 1]))
+    if not os.path.isdir(FONTS_DIR):
+        print(f"ERROR: {FONTS_DIR} not found")
+        sys.exit(1)
+
+    if '--list' in args:
+        for dirpath, dirnames, filenames in sorted(os.walk(FONTS_DIR)):
+            if any(fn.lower().endswith(FONT_EXTS) for fn in filenames):
+                sys.stdout.write(font_index(dirpath)[1].split("\n", 1)[1])
+        return
+
+    changed, written = install(FONTS_DIR, dest, dry_run)
+    copied = sum(len(files) for files in changed.values())
+    print(f"{dest}: {copied} fonts {'to copy' if dry_run else 'copied'}, "
+          f"{written} index files {'to write' if dry_run else 'written'}")
+    font_dirs = set(changed) | read_pending(dest)
+    if font_dirs and not dry_run:
+        if update_font_cache(font_dirs):
+            write_pending(dest, ())
+            print(f"Updated the font cache of {len(font_dirs)} directories")
+        else:
+            write_pending(dest, font_dirs)
+            print(f"fc-cache failed or not found, the font cache was not updated; "
+                  f"run install-fonts.py again to retry")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
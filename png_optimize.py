@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+Lossless PNG optimizer for the icon and theme images.
+Rewrites the PNGs under .icons and .themes/CDE-Theme as the smallest
+encoding of the same pixels it can find with zlib and a chunk rewrite,
+without optipng/pngcrush in dom0.
+
+Usage:
+    python3 png_optimize.py [dir or file ...]   # default: .icons and .themes/CDE-Theme
+    python3 png_optimize.py --dry-run           # report the savings, write nothing
+    python3 png_optimize.py -j 4                # worker processes (default: one per core)
+    python3 png_optimize.py --quiet             # only print the totals
+
+For every image:
+  - all ancillary chunks are dropped except the tRNS the pixels need: text,
+    timestamps, pHYs, bKGD and the gAMA/cHRM/iCCP/sRGB color management
+    that GTK's pixbuf loader does not apply anyway;
+  - 16 bit images whose samples all fit in 8 bits become 8 bit, opaque
+    images lose their alpha channel, gray RGB becomes gray, and images
+    with at most 256 colors become indexed at the smallest bit depth that
+    holds their palette;
+  - every candidate is filtered with each fixed filter type and with the
+    adaptive (minimum sum of absolute differences) choice per row and
+    deflated at level 9; the smallest stream is deflated again with the
+    filtered and RLE strategies. The smallest file wins if it is smaller
+    than the original.
+The winner is decoded again and compared pixel by pixel with the original
+before it replaces it. Interlaced images are left alone.
+
+Identical images are optimized once. Results are remembered in
+.png-cache.json by the sha1 of the input, so a second run only looks at
+the images that changed since.
+"""
+
+import os
+import sys
+import json
+import stat
+import zlib
+import struct
+import shutil
+import hashlib
+import multiprocessing
+
+import icon_cache
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIRS = [os.path.join(SCRIPT_DIR, ".icons"), os.path.join(SCRIPT_DIR, ".themes", "CDE-Theme")]
+CACHE_FILE = os.path.join(SCRIPT_DIR, ".png-cache.json")
+OPTIMIZER_VERSION = 1
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+CHUNK_HEADER = struct.Struct('>I4s')    # payload length, chunk type
+IHDR = struct.Struct('>IIBBBBB')        # width, height, bit depth, color type, compression, filter, interlace
+
+GRAY, RGB, INDEXED, GRAY_ALPHA, RGBA = 0, 2, 3, 4, 6
+CHANNELS = {GRAY: 1, RGB: 3, INDEXED: 1, GRAY_ALPHA: 2, RGBA: 4}
+BIT_DEPTHS = {GRAY: (1, 2, 4, 8, 16), RGB: (8, 16), INDEXED: (1, 2, 4, 8),
+              GRAY_ALPHA: (8, 16), RGBA: (8, 16)}
+
+FILTER_TYPES = (0, 1, 2, 3, 4)          # none, sub, up, average, paeth
+ADAPTIVE = 5
+STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE)
+
+# how far a filtered byte is from zero, read as a signed value
+_DISTANCE = bytes(v if v < 128 else 256 - v for v in range(256))
+
+
+# --- chunks ------------------------------------------------------------------
+
+def read_chunks(data):
+    """[(chunk type, payload)] of a PNG file, CRCs checked."""
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+    chunks = []
+    pos = 8
+    while pos + CHUNK_HEADER.size <= len(data):
+        length, kind = CHUNK_HEADER.unpack_from(data, pos)
+        payload = data[pos + 8:pos + 8 + length]
+        crc = data[pos + 8 + length:pos + 12 + length]
+        if len(payload) != length or len(crc) != 4:
+            raise ValueError(f"truncated {kind.decode('latin-1')} chunk")
+        if zlib.crc32(kind + payload) != struct.unpack('>I', crc)[0]:
+            raise ValueError(f"bad CRC in {kind.decode('latin-1')} chunk")
+        chunks.append((kind, payload))
+        pos += 12 + length
+        if kind == b'IEND':
+            break
+    if not chunks or chunks[0][0] != b'IHDR' or chunks[-1][0] != b'IEND':
+        raise ValueError("missing IHDR or IEND chunk")
+    return chunks
+
+
+def write_chunk(kind, payload):
+    return (CHUNK_HEADER.pack(len(payload), kind) + payload
+            + struct.pack('>I', zlib.crc32(kind + payload)))
+
+
+# --- decoding ----------------------------------------------------------------
+
+def row_bytes(width, color_type, depth):
+    return (width * CHANNELS[color_type] * depth + 7) // 8
+
+
+def pixel_bytes(color_type, depth):
+    """The filter distance: bytes per complete pixel, at least 1."""
+    return max(1, CHANNELS[color_type] * depth // 8)
+
+
+def paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def unfilter(raw, height, stride, bpp):
+    """The scanlines of a decompressed, non interlaced IDAT stream."""
+    rows = []
+    prev = bytes(stride)
+    pos = 0
+    for y in range(height):
+        kind = raw[pos] if pos < len(raw) else None
+        row = bytearray(raw[pos + 1:pos + 1 + stride])
+        if kind is None or len(row) != stride:
+            raise ValueError("truncated image data")
+        pos += 1 + stride
+        if kind == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xff
+        elif kind == 2:
+            row = bytearray((x + p) & 0xff for x, p in zip(row, prev))
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xff
+        elif kind == 4:
+            for i in range(stride):
+                if i >= bpp:
+                    row[i] = (row[i] + paeth(row[i - bpp], prev[i], prev[i - bpp])) & 0xff
+                else:
+                    row[i] = (row[i] + prev[i]) & 0xff
+        elif kind:
+            raise ValueError(f"unknown filter type {kind}")
+        rows.append(bytes(row))
+        prev = row
+    return rows
+
+
+def decode_png(data):
+    """(width, height, color type, bit depth, PLTE, tRNS, scanlines) of a PNG.
+    PLTE and tRNS are the raw payloads or None."""
+    chunks = read_chunks(data)
+    width, height, depth, color_type, compression, filter_method, interlace = IHDR.unpack(chunks[0][1])
+    if depth not in BIT_DEPTHS.get(color_type, ()) or compression or filter_method:
+        raise ValueError(f"unsupported IHDR (color type {color_type}, bit depth {depth})")
+    if interlace:
+        raise ValueError("interlaced")
+    palette = trns = None
+    idat = []
+    for kind, payload in chunks[1:-1]:
+        if kind == b'IDAT':
+            idat.append(payload)
+        elif kind == b'PLTE':
+            palette = payload
+        elif kind == b'tRNS':
+            trns = payload
+        elif not kind[0] & 0x20:
+            raise ValueError(f"unknown critical chunk {kind.decode('latin-1')}")
+    if color_type == INDEXED and not palette:
+        raise ValueError("indexed image without PLTE")
+    stride = row_bytes(width, color_type, depth)
+    rows = unfilter(zlib.decompress(b''.join(idat)), height, stride,
+                    pixel_bytes(color_type, depth))
+    return width, height, color_type, depth, palette, trns, rows
+
+
+def unpack_samples(rows, width, depth):
+    """One byte per sample of 1, 2 or 4 bit scanlines."""
+    per_byte = 8 // depth
+    mask = (1 << depth) - 1
+    table = [bytes((b >> (8 - depth * (k + 1))) & mask for k in range(per_byte)) for b in range(256)]
+    return b''.join(b''.join(table[b] for b in row)[:width] for row in rows)
+
+
+def interleave(planes, n):
+    """Interleave equally long sample planes (bytes, one or two bytes per
+    sample) into n pixels."""
+    size = len(planes[0]) // n
+    out = bytearray(len(planes) * size * n)
+    step = len(planes) * size
+    for k, plane in enumerate(planes):
+        for b in range(size):
+            out[k * size + b::step] = plane[b::size]
+    return bytes(out)
+
+
+def to_rgba(width, height, color_type, depth, palette, trns, rows):
+    """The pixels as RGBA samples, 4 bytes per pixel, or 8 (big endian) when
+    the image has 16 bit samples. Two encodings of an image are the same
+    image when these are equal."""
+    n = width * height
+    if depth < 8 or color_type == INDEXED:
+        samples = b''.join(rows) if depth == 8 else unpack_samples(rows, width, depth)
+        if color_type == INDEXED:
+            if max(samples, default=0) >= len(palette) // 3:
+                raise ValueError("pixel index outside the palette")
+            alpha = (trns or b'') + b'\xff' * 256
+            red = palette[0::3].ljust(256, b'\0')
+            green = palette[1::3].ljust(256, b'\0')
+            blue = palette[2::3].ljust(256, b'\0')
+            return interleave([samples.translate(red), samples.translate(green),
+                               samples.translate(blue), samples.translate(alpha[:256])], n)
+        # gray at 1/2/4 bits: scale by bit replication, as libpng expands it
+        levels = (1 << depth) - 1
+        scale = bytes(v * 255 // levels if v <= levels else 0 for v in range(256))
+        key = struct.unpack('>H', trns)[0] if trns else None
+        alpha = bytes(0 if v == key else 255 for v in range(256))
+        gray = samples.translate(scale)
+        return interleave([gray, gray, gray, samples.translate(alpha)], n)
+
+    size = depth // 8
+    data = b''.join(rows)
+    channels = CHANNELS[color_type]
+    planes = []
+    for k in range(channels):
+        plane = bytearray(n * size)
+        for b in range(size):
+            plane[b::size] = data[k * size + b::channels * size]
+        planes.append(bytes(plane))
+    if color_type in (GRAY, GRAY_ALPHA):
+        planes[1:1] = [planes[0], planes[0]]
+    if color_type in (GRAY, RGB):
+        opaque = b'\xff' * size
+        alpha = bytearray(opaque * n)
+        if trns:
+            # the tRNS key is one 16 bit value per channel, whatever the depth
+            values = struct.unpack(f'>{channels}H', trns)
+            if max(values) < 1 << depth:
+                key = b''.join(v.to_bytes(size, 'big') for v in values)
+                pos = data.find(key)
+                while pos >= 0:
+                    if pos % len(key) == 0:
+                        i = pos // len(key) * size
+                        alpha[i:i + size] = bytes(size)
+                    pos = data.find(key, pos + 1)
+        planes.append(bytes(alpha))
+    return interleave(planes, n)
+
+
+# --- encoding ----------------------------------------------------------------
+
+def pack_samples(samples, width, depth):
+    """Scanlines of 1, 2, 4 or 8 bit samples, one byte per sample in."""
+    if depth == 8:
+        return [samples[y:y + width] for y in range(0, len(samples), width)]
+    per_byte = 8 // depth
+    rows = []
+    for y in range(0, len(samples), width):
+        row = bytearray()
+        line = samples[y:y + width]
+        for x in range(0, width, per_byte):
+            v = 0
+            for k, s in enumerate(line[x:x + per_byte]):
+                v |= s << (8 - depth * (k + 1))
+            row.append(v)
+        rows.append(bytes(row))
+    return rows
+
+
+def reduced_layouts(width, height, pixels):
+    """Smaller (color type, bit depth, PLTE, tRNS, scanlines) encodings of 8 bit
+    RGBA `pixels`: without the alpha channel when it is opaque, gray when
+    it is gray, indexed when it has at most 256 colors."""
+    n = width * height
+    red, green, blue, alpha = pixels[0::4], pixels[1::4], pixels[2::4], pixels[3::4]
+    opaque = alpha.count(255) == n
+    gray = red == green == blue
+    if gray:
+        color_type, planes = (GRAY, [red]) if opaque else (GRAY_ALPHA, [red, alpha])
+    else:
+        color_type, planes = (RGB, [red, green, blue]) if opaque else (RGBA, [red, green, blue, alpha])
+    samples = interleave(planes, n)
+    stride = width * len(planes)
+    layouts = [(color_type, 8, None, None, [samples[y:y + stride] for y in range(0, len(samples), stride)])]
+
+    colors = {}
+    for i in range(0, len(pixels), 4):
+        color = pixels[i:i + 4]
+        if color not in colors:
+            if len(colors) == 256:
+                return layouts
+            colors[color] = None
+    # translucent entries first, so tRNS only lists those
+    palette = sorted(colors, key=lambda c: (c[3] == 255, c))
+    index = {color: i for i, color in enumerate(palette)}
+    indices = bytes(index[pixels[i:i + 4]] for i in range(0, len(pixels), 4))
+    depth = next(d for d in (1, 2, 4, 8) if len(palette) <= 1 << d)
+    translucent = sum(1 for c in palette if c[3] != 255)
+    layouts.append((INDEXED, depth, b''.join(c[:3] for c in palette),
+                    bytes(c[3] for c in palette[:translucent]) or None,
+                    pack_samples(indices, width, depth)))
+    return layouts
+
+
+def filter_row(kind, row, prev, bpp):
+    left = bytes(bpp) + row[:-bpp]
+    if kind == 0:
+        return row
+    if kind == 1:
+        return bytes((x - a) & 0xff for x, a in zip(row, left))
+    if kind == 2:
+        return bytes((x - b) & 0xff for x, b in zip(row, prev))
+    if kind == 3:
+        return bytes((x - ((a + b) >> 1)) & 0xff for x, a, b in zip(row, left, prev))
+    upper_left = bytes(bpp) + prev[:-bpp]
+    return bytes((x - paeth(a, b, c)) & 0xff for x, a, b, c in zip(row, left, prev, upper_left))
+
+
+def filtered_streams(rows, bpp):
+    """The IDAT stream of `rows` for every fixed filter type and for the
+    adaptive per-row choice, as {method: bytes}."""
+    streams = {method: bytearray() for method in FILTER_TYPES + (ADAPTIVE,)}
+    prev = bytes(len(rows[0]) if rows else 0)
+    for row in rows:
+        filtered = [filter_row(kind, row, prev, bpp) for kind in FILTER_TYPES]
+        for kind in FILTER_TYPES:
+            streams[kind].append(kind)
+            streams[kind] += filtered[kind]
+        best = min(FILTER_TYPES, key=lambda kind: sum(filtered[kind].translate(_DISTANCE)))
+        streams[ADAPTIVE].append(best)
+        streams[ADAPTIVE] += filtered[best]
+        prev = row
+    return streams
+
+
+def deflate(stream, strategy=zlib.Z_DEFAULT_STRATEGY):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(stream) + compressor.flush()
+
+
+def encode_png(width, height, color_type, depth, palette, trns, idat):
+    chunks = [write_chunk(b'IHDR', IHDR.pack(width, height, depth, color_type, 0, 0, 0))]
+    if palette:
+        chunks.append(write_chunk(b'PLTE', palette))
+    if trns:
+        chunks.append(write_chunk(b'tRNS', trns))
+    chunks.append(write_chunk(b'IDAT', idat))
+    chunks.append(write_chunk(b'IEND', b''))
+    return PNG_SIGNATURE + b''.join(chunks)
+
+
+def best_stream(layout):
+    """(IDAT, filtered stream) of the filter method whose stream deflates
+    smallest for one (color type, bit depth, PLTE, tRNS, scanlines)."""
+    color_type, depth, palette, trns, rows = layout
+    best = None
+    seen = set()
+    for stream in filtered_streams(rows, pixel_bytes(color_type, depth)).values():
+        stream = bytes(stream)
+        if stream in seen:
+            continue
+        seen.add(stream)
+        idat = deflate(stream)
+        if best is None or len(idat) < len(best[0]):
+            best = idat, stream
+    return best
+
+
+def same_pixels(a, b):
+    """Compare to_rgba() results, expanding 8 bit samples when the other
+    side has 16 bit ones (an 8 bit value v is the 16 bit value v * 257)."""
+    if len(a) == len(b):
+        return a == b
+    if len(a) > len(b):
+        a, b = b, a
+    wide = bytearray(2 * len(a))
+    wide[0::2] = a
+    wide[1::2] = a
+    return wide == b
+
+
+def smallest_png(width, height, layouts):
+    """The smallest PNG over candidate (color type, bit depth, PLTE, tRNS,
+    scanlines) layouts of one image. Every candidate is compared with the
+    default strategy; only the winning stream is deflated again with the
+    others."""
+    winner = None
+    for layout in layouts:
+        idat, stream = best_stream(layout)
+        size = len(idat) + (len(layout[2]) if layout[2] else 0) + (len(layout[3]) if layout[3] else 0)
+        if winner is None or size < winner[0]:
+            winner = size, layout, idat, stream
+    size, (color_type, depth, palette, trns, rows), idat, stream = winner
+    for strategy in STRATEGIES[1:]:
+        candidate = deflate(stream, strategy)
+        if len(candidate) < len(idat):
+            idat = candidate
+    return encode_png(width, height, color_type, depth, palette, trns, idat)
+
+
+def encode_rgba(width, height, pixels):
+    """The smallest PNG of 8 bit RGBA `pixels` (4 bytes per pixel)."""
+    return smallest_png(width, height, reduced_layouts(width, height, pixels))
+
+
+def optimize_png(data):
+    """The smallest lossless re-encoding of PNG `data`, or `data` itself
+    when none is smaller. Raises ValueError for what it cannot decode."""
+    image = decode_png(data)
+    width, height, color_type, depth, palette, trns, rows = image
+    pixels = to_rgba(*image)
+    layouts = [(color_type, depth, palette, trns, rows)]
+    if depth == 16 and pixels[0::2] == pixels[1::2]:
+        layouts += reduced_layouts(width, height, pixels[0::2])
+    elif depth <= 8:
+        layouts += reduced_layouts(width, height, pixels)
+
+    best = smallest_png(width, height, layouts)
+    if len(best) >= len(data):
+        return data
+    if not same_pixels(to_rgba(*decode_png(best)), pixels):
+        raise AssertionError("re-encoded image has different pixels")
+    return best
+
+
+# --- the tree ----------------------------------------------------------------
+
+def load_cache():
+    try:
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('version') != OPTIMIZER_VERSION:
+        return {}
+    return cache.get('results', {})
+
+
+def save_cache(results):
+    with open(CACHE_FILE + '.tmp', 'w') as f:
+        json.dump({'version': OPTIMIZER_VERSION, 'results': results}, f, indent=1, sort_keys=True)
+    os.replace(CACHE_FILE + '.tmp', CACHE_FILE)
+
+
+def list_pngs(targets):
+    """{(device, inode): [paths]} of the regular .png files in `targets`.
+    Symlinks are skipped, their target is optimized where it lives."""
+    inodes = {}
+
+    def add(path):
+        st = os.lstat(path)
+        if stat.S_ISREG(st.st_mode):
+            inodes.setdefault((st.st_dev, st.st_ino), []).append(path)
+
+    for target in targets:
+        if not os.path.isdir(target):
+            add(target)
+            continue
+        for dirpath, dirnames, filenames in os.walk(target):
+            dirnames.sort()
+            for fn in sorted(filenames):
+                if fn.endswith('.png'):
+                    add(os.path.join(dirpath, fn))
+    return inodes
+
+
+def optimize_file(job):
+    """Pool worker: (input sha1, original size, optimized bytes or None, error)."""
+    digest, path = job
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        best = optimize_png(data)
+    except (ValueError, zlib.error) as e:
+        return digest, len(data), None, str(e)
+    return digest, len(data), best if len(best) < len(data) else None, None
+
+
+def replace_file(paths, data):
+    """Write `data` over the file behind `paths` (hardlinks of one inode)
+    with an atomic rename, keeping its mode and its other links."""
+    first = paths[0]
+    tmp = os.path.join(os.path.dirname(first), f".{os.path.basename(first)}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    shutil.copymode(first, tmp)
+    os.replace(tmp, first)
+    for path in paths[1:]:
+        os.link(first, tmp)
+        os.replace(tmp, path)
+
+
+def icon_theme_of(path):
+    """The icon theme directory (holding an icon-theme.cache) `path` is in."""
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory != os.path.dirname(directory):
+        if os.path.isfile(os.path.join(directory, icon_cache.CACHE_NAME)):
+            return directory
+        directory = os.path.dirname(directory)
+    return None
+
+
+def rel(path):
+    return os.path.relpath(path, SCRIPT_DIR)
+
+
+def main():
+    args = sys.argv[1:]
+    quiet = '--quiet' in args
+    dry_run = '--dry-run' in args or '-n' in args
+    jobs = os.cpu_count() or 1
+    if '-j' in args:
+        jobs = max(1, int(args[args.index('-j') + 1]))
+        del args[args.index('-j'):args.index('-j') + 2]
+    targets = [a for a in args if not a.startswith('-')] or DEFAULT_DIRS
+
+    inodes = list_pngs(targets)
+    digests = {}
+    for key, paths in inodes.items():
+        with open(paths[0], 'rb') as f:
+            digests[key] = hashlib.sha1(f.read()).hexdigest()
+
+    # one job per distinct content the cache does not already know as optimal
+    cache = load_cache()
+    todo = {}
+    for key, digest in sorted(digests.items(), key=lambda item: inodes[item[0]][0]):
+        if cache.get(digest) != digest:
+            todo.setdefault(digest, inodes[key][0])
+    results = {}
+    if todo:
+        # biggest images first, so no worker is left with one at the end
+        order = sorted(todo.items(), key=lambda item: -os.path.getsize(item[1]))
+        with multiprocessing.Pool(min(jobs, len(order))) as pool:
+            for digest, size, best, error in pool.imap_unordered(optimize_file, order):
+                results[digest] = (size, best, error)
+
+    per_dir = {}
+    themes = set()
+    skipped = 0
+    for key, paths in sorted(inodes.items(), key=lambda item: item[1][0]):
+        digest = digests[key]
+        size = os.lstat(paths[0]).st_size
+        new_size = size
+        if digest in results:
+            size, best, error = results[digest]
+            if error:
+                skipped += 1
+                if not quiet:
+                    print(f"  SKIPPED  {rel(paths[0])}: {error}")
+            elif best is not None:
+                new_size = len(best)
+                if not dry_run:
+                    replace_file(paths, best)
+                    themes.add(icon_theme_of(paths[0]))
+        directory = rel(os.path.dirname(paths[0]))
+        count, before, after = per_dir.get(directory, (0, 0, 0))
+        per_dir[directory] = (count + 1, before + size, after + new_size)
+
+    if not dry_run:
+        for digest, (size, best, error) in results.items():
+            if best is None:
+                cache[digest] = digest
+            else:
+                optimized = hashlib.sha1(best).hexdigest()
+                cache[digest] = optimized
+                cache[optimized] = optimized
+        save_cache(cache)
+
+    if not quiet:
+        for directory, (count, before, after) in sorted(per_dir.items(), key=lambda item: item[1][2] - item[1][1]):
+            if after < before:
+                print(f"  {before - after:>9}  {100 * (before - after) / before:5.1f}%  "
+                      f"{count:>5} files  {directory}")
+        print()
+    count = sum(c for c, b, a in per_dir.values())
+    before = sum(b for c, b, a in per_dir.values())
+    after = sum(a for c, b, a in per_dir.values())
+    print(f"{'Would save' if dry_run else 'Saved'} {before - after} of {before} bytes "
+          f"({100 * (before - after) / max(before, 1):.1f}%) in {count} PNGs, "
+          f"{len(results)} images tried, {len(set(digests.values())) - len(todo)} known optimal, "
+          f"{skipped} skipped")
+
+    for theme_dir in sorted(t for t in themes if t):
+        n_dirs, n_icons, rescanned = icon_cache.update_cache(theme_dir)
+        print(f"Updated {os.path.join(theme_dir, icon_cache.CACHE_NAME)} "
+              f"({rescanned} directories rescanned)")
+
+
+if __name__ == '__main__':
+    main()